@@ -83,7 +83,12 @@ async def confirm_traffic(
     token_usage = ai_response_data.get("usage", 0)
 
     # 5. Final Audit
-    audit_result = auditor.audit_payload(target_payload, policy_prompt=cached_data.get("policy_prompt"))
+    audit_result = await auditor.audit_payload(
+        target_payload,
+        policy_prompt=cached_data.get("policy_prompt"),
+        cache=cached_data.get("audit_cache", True),
+        policy_config=cached_data.get("policy_config"),
+    )
     
     # Log it with bypass flag
     background_tasks.add_task(
@@ -2,12 +2,17 @@ from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
 from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional
 from datetime import datetime, timezone, timedelta
-from app.core.redaction import redactor
+from app.core.redaction import PayloadLimitError, redactor, serialize_hits
+from app.core.executor import redaction_executor, ExecutorSaturatedError
 from app.core.auditor import auditor
+from app.core.logging import logger
+from app.core.pipeline import StageGraph
 from app.db.supabase import supabase
 from app.core.security import get_api_key
+from app.config import settings, ErrorMessages
 from tenacity import retry, stop_after_attempt, wait_exponential
 from fastapi_limiter.depends import RateLimiter
+import asyncio
 import uuid
 import json
 import redis.asyncio as redis
@@ -76,6 +81,23 @@ def log_transaction(payload_raw: Dict, payload_redacted: Dict, audit_result: Any
         print(f"Failed to log transaction (Attempting Retry): {e}")
         raise e # Re-raise to trigger tenacity retry
 
+async def fetch_policy_prompt(request: InterceptRequest) -> Optional[str]:
+    """Auditor prompt from the policy config, else from the policies table"""
+    # Priority 1: Config Payload
+    if request.policy_config and request.policy_config.get("auditor_prompt"):
+        return request.policy_config.get("auditor_prompt")
+
+    # Priority 2: DB Lookup (if no prompt in config); the Supabase client is synchronous
+    if request.policy_id:
+        try:
+            query = supabase.table("policies").select("rules_prompt").eq("id", request.policy_id)
+            response = await asyncio.to_thread(query.execute)
+            if response.data:
+                return response.data[0]["rules_prompt"]
+        except Exception as ex:
+            print(f"Policy Fetch Error: {ex}") 
+    return None
+
 @router.post("/intercept", response_model=InterceptResponse, dependencies=[Depends(RateLimiter(times=100, seconds=60))])
 async def intercept_traffic(
     request: InterceptRequest, 
@@ -84,37 +106,44 @@ async def intercept_traffic(
     api_key: str = Depends(get_api_key)
 ):
     start_time = datetime.now()
+    graph = StageGraph()
     try:
         request_id = getattr(req.state, "request_id", "unknown")
         
         # Extract conversation_id
         conversation_id = request.metadata.get("conversation_id") if request.metadata else None
         
+        # Policies can opt out of reusing cached audit verdicts
+        audit_cache = bool((request.policy_config or {}).get("cache_audit", True))
+
+        # Stages run as a dependency graph: policy lookup, conversation context
+        # and redaction start together; audit and LLM start once their inputs are ready
         # Step 0: Policy Lookup
-        policy_prompt = None
-        
-        # Priority 1: Config Payload
-        if request.policy_config and request.policy_config.get("auditor_prompt"):
-            policy_prompt = request.policy_config.get("auditor_prompt")
-        
-        # Priority 2: DB Lookup (if no prompt in config)
-        elif request.policy_id:
-            try:
-                response = supabase.table("policies").select("rules_prompt").eq("id", request.policy_id).execute()
-                if response.data:
-                    policy_prompt = response.data[0]["rules_prompt"]
-            except Exception as ex:
-                print(f"Policy Fetch Error: {ex}") 
+        graph.add("policy", lambda: fetch_policy_prompt(request))
+        # Conversation context for the LLM (Supabase); only used on the clean path
+        graph.add("context", lambda: build_conversation_context(conversation_id))
 
         # Step 1: Redaction (The Shield)
         # Enable Synthetic Swapping for "Advanced Security" demo
-        redacted_data, hits = redactor.redact_json(request.payload, mode="swap", config=request.policy_config)
+        # CPU-bound: runs on the bounded redaction executor, not the event loop
+        graph.add(
+            "redaction",
+            lambda: redaction_executor.run(redactor.redact_json, request.payload, mode="swap", config=request.policy_config)
+        )
+        try:
+            redacted_data, hits = await graph.result("redaction")
+        except ExecutorSaturatedError:
+            raise HTTPException(status_code=503, detail=ErrorMessages.SERVICE_UNAVAILABLE)
+        except PayloadLimitError:
+            raise HTTPException(status_code=413, detail=ErrorMessages.PAYLOAD_TOO_COMPLEX)
         
         # Simple check: If data changed, PII was found.
         has_pii = len(hits) > 0 # Use hits list for accuracy
         
         if has_pii:
-            # PII DETECTED -> PAUSE FLOW
+            # PII DETECTED -> PAUSE FLOW (the LLM context is no longer needed)
+            graph.cancel("context")
+            policy_prompt = await graph.result("policy")
             pending_id = str(uuid.uuid4())
             redis_url = os.environ.get("UPSTASH_REDIS_URL", "redis://localhost:6379")
             
@@ -135,8 +164,10 @@ async def intercept_traffic(
             cache_data = {
                 "original": request.payload,
                 "redacted": redacted_data,
-                "hits": hits, # Store hits
+                "hits": serialize_hits(hits, settings.REDACTION_MAX_CONTEXT_HITS), # Store hits (context capped)
                 "policy_prompt": policy_prompt,
+                "audit_cache": audit_cache,
+                "policy_config": request.policy_config,
                 "request_id": request_id, 
                 "source": request.source,
                 "metadata": request.metadata # Store metadata (conversation_id)
@@ -154,48 +185,54 @@ async def intercept_traffic(
                 status="REQUIRES_CONFIRMATION",
                 processed_at=datetime.now(timezone.utc),
                 pending_id=pending_id,
-                violation_details=f"Detected: {', '.join(list(set([h['type'] for h in hits])))}", # Unique types
+                violation_details=f"Detected: {', '.join(list(set([h.type for h in hits])))}", # Unique types
                 redacted_payload=redacted_data 
             )
 
-        # Step 2: Auditing (The Sense)
-        audit_result = auditor.audit_payload(redacted_data, policy_prompt=policy_prompt) if policy_prompt else auditor.audit_payload(redacted_data)
+        # Step 2: Auditing (The Sense) - needs the redacted payload and the policy prompt
+        async def audit(redaction, policy_prompt):
+            audit_options = {"cache": audit_cache, "policy_config": request.policy_config}
+            return await auditor.audit_payload(redaction[0], policy_prompt=policy_prompt, **audit_options) if policy_prompt else await auditor.audit_payload(redaction[0], **audit_options)
 
-        # Step 3: LLM Generation (The Brain) - If Safe
-        ai_response_text = None
+        graph.add("audit", audit, "redaction", "policy")
+
+        # Step 3: LLM Generation (The Brain) - Safe path
+        # The verdict does not gate the call, so it runs alongside the audit
+        # Extract prompt from payload
+        prompt = request.payload.get("input") or request.payload.get("message") or request.payload.get("prompt") or json.dumps(request.payload)
         
-        if not has_pii:
-            # Extract prompt from payload
-            prompt = request.payload.get("input") or request.payload.get("message") or request.payload.get("prompt") or json.dumps(request.payload)
-            
-            # Log User Message
-            if conversation_id:
-                model = request.payload.get("model", "Gemini 3 Flash")
-                background_tasks.add_task(
-                    add_chat_message, 
-                    conversation_id, 
-                    "user", 
-                    prompt, 
-                    "verified",
-                    title=prompt[:50],
-                    model=model
-                )
+        # Log User Message
+        if conversation_id:
+            model = request.payload.get("model", "Gemini 3 Flash")
+            background_tasks.add_task(
+                add_chat_message, 
+                conversation_id, 
+                "user", 
+                prompt, 
+                "verified",
+                title=prompt[:50],
+                model=model
+            )
 
-            # Call Gemini/LLM
-            context_str = await build_conversation_context(conversation_id)
-            
-            final_prompt = context_str + str(prompt)
-            
-            llm_result = await llm_router.route_request(
+        # Call Gemini/LLM with the conversation context
+        graph.add(
+            "llm",
+            lambda context_str: llm_router.route_request(
                 provider="gemini", # Default to Gemini for now
-                prompt=final_prompt,
+                prompt=context_str + str(prompt),
                 system_instruction="You are a helpful AI assistant. Please respond to the user's request."
-            )
-            ai_response_text = llm_result.get("text")
-            
-            # Log AI Response
-            if conversation_id and ai_response_text:
-                background_tasks.add_task(add_chat_message, conversation_id, "assistant", ai_response_text, "verified")
+            ),
+            "context"
+        )
+
+        audit_result = await graph.result("audit")
+        llm_result = await graph.result("llm")
+        ai_response_text = llm_result.get("text")
+        
+        # Log AI Response
+        if conversation_id and ai_response_text:
+            background_tasks.add_task(add_chat_message, conversation_id, "assistant", ai_response_text, "verified")
+        logger.debug(f"Intercept stage timings (ms): {graph.timings}")
 
         # Step 4: Logging
         log_metadata = {
@@ -227,8 +264,13 @@ async def intercept_traffic(
             )
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Stop stages nobody waited for (e.g. context fetch on the paused path, errors)
+        await graph.aclose()
 
 class ConfirmRequest(BaseModel):
     pending_id: str
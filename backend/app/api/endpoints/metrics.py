@@ -0,0 +1,43 @@
+"""
+Metrics Endpoint
+Exposes in-process counters (executors, caches) for monitoring
+"""
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any
+
+from app.config import settings
+from app.core.auditor import auditor
+from app.core.executor import redaction_executor
+from app.core.llm_client import provider_stats
+from app.core.llm_router import llm_router
+from app.core.memory import process_memory
+from app.core.redaction import redactor
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Per-worker runtime metrics
+
+    Returns:
+        - executors: queue depth, throughput and wait/run times
+        - redaction: redaction engine counters
+        - llm: requests / failures per LLM provider
+        - audit / llm_router: pre-audit, verdict cache, batching and single-flight counters
+        - memory: this worker's unique / shared memory (MB)
+    """
+    if not settings.ENABLE_METRICS:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+
+    return {
+        "executors": {
+            "redaction": redaction_executor.stats(),
+        },
+        "redaction": redactor.stats(),
+        "llm": provider_stats(),
+        "audit": auditor.stats(),
+        "llm_router": llm_router.stats(),
+        "memory": process_memory(),
+    }
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from app.core.redaction import redactor
+from app.core.executor import redaction_executor, ExecutorSaturatedError
+from app.config import ErrorMessages, settings
 from app.core.security import get_api_key
 
 router = APIRouter()
@@ -13,6 +15,17 @@ class ScanResponse(BaseModel):
     redacted: str
     has_pii: bool
 
+def redact_streamed(text: str) -> tuple[str, bool]:
+    """Redact `text` window by window so large inputs never go through a single full-size scan"""
+    size = settings.REDACTION_STREAM_WINDOW
+    chunks = (text[i:i + size] for i in range(0, len(text), size))
+    pieces = []
+    has_pii = False
+    for redacted, hits in redactor.redact_stream(chunks, mode="redact", total_length=len(text)):
+        pieces.append(redacted)
+        has_pii = has_pii or bool(hits)
+    return "".join(pieces), has_pii
+
 @router.post("/scan", response_model=ScanResponse, dependencies=[Depends(get_api_key)])
 async def scan_text(request: ScanRequest):
     """
@@ -22,14 +35,16 @@ async def scan_text(request: ScanRequest):
     try:
         # We always use 'redact' mode for Egress to stay safe 
         # (Swapping might be confusing in output unless specifically requested)
-        redacted = redactor.redact_text(request.text, mode="redact")
-        
-        has_pii = redacted != request.text
+        # Streamed in windows: hits are only counted, so each window's text
+        # is released as soon as it has been redacted
+        redacted, has_pii = await redaction_executor.run(redact_streamed, request.text)
         
         return {
             "original": request.text,
             "redacted": redacted,
             "has_pii": has_pii
         }
+    except ExecutorSaturatedError:
+        raise HTTPException(status_code=503, detail=ErrorMessages.SERVICE_UNAVAILABLE)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scan failed: {str(e)}")
@@ -115,6 +115,7 @@ class CacheKeys:
     ACTIVE_PROFILE = "active_profile:{user_id}"
     ANALYTICS = "analytics:{user_id}:{range}"
     SESSION = "session:{session_id}"
+    AUDIT_VERDICT = "audit:{model}:{policy}:{payload}"
     
     @staticmethod
     def pending(request_id: str) -> str:
@@ -127,6 +128,10 @@ class CacheKeys:
     @staticmethod
     def analytics(user_id: str, time_range: str) -> str:
         return f"analytics:{user_id}:{time_range}"
+    
+    @staticmethod
+    def audit_verdict(payload_hash: str, policy_hash: str, model_hash: str) -> str:
+        return f"audit:{model_hash}:{policy_hash}:{payload_hash}"
 
 
 # ============================================================================
@@ -204,6 +209,7 @@ class ErrorMessages:
     # Validation
     INVALID_PAYLOAD = "Invalid payload format"
     PAYLOAD_TOO_LARGE = "Payload exceeds maximum size"
+    PAYLOAD_TOO_COMPLEX = "Payload exceeds maximum nesting depth or node count"
     MISSING_REQUIRED_FIELD = "Missing required field: {field}"
     
     # Resources
@@ -250,6 +256,17 @@ class RegexPatterns:
     SSN = r'\b\d{3}-\d{2}-\d{4}\b'
     API_KEY = r'sk-[a-zA-Z0-9]{20,}'
     UUID = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+    HEX = r'(?:0x)?[0-9a-fA-F]{8,}'
+    NUMBER = r'[-+]?(?:\d[\d,_ ]*)?\.?\d+(?:[eE][-+]?\d+)?%?'
+    ISO_TIMESTAMP = r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?'
+    BASE64 = r'[A-Za-z0-9+/_-]{24,}={0,2}'
+    # A word starting with a capital followed by a lowercase letter or by
+    # more capitals (all-caps names like "IBM", "JOHN SMITH")
+    CAPITALIZED_WORD = r'(?<![^\W\d_])[A-ZÀ-ÖØ-Þ][a-zß-öø-ÿA-ZÀ-ÖØ-Þ]'
+    # Credential shapes: a long run mixing letters and digits (API keys,
+    # tokens, JWT segments) and a password-like mix of all character classes
+    SECRET_TOKEN = r'(?=[A-Za-z0-9_+/=]*\d)(?=[0-9_+/=]*[A-Za-z])[A-Za-z0-9_+/=]{16,}'
+    PASSWORD_LIKE = r'(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[^A-Za-z0-9]).{8,}'
 
 
 # ============================================================================
@@ -23,6 +23,9 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     WORKERS: int = 4
+    SERVER_BACKLOG: int = 2048  # listen() backlog of the shared socket (app.server)
+    SERVER_MEMORY_REPORT_INTERVAL: int = 300  # seconds between worker memory reports (0 = off)
+    IMPORT_TIME_BUDGET_MS: int = 2000  # max time to import app.main (enforced by tests)
     
     # Security (optional for development)
     SECRET_KEY: str = "dev-secret-key-change-in-production"
@@ -51,6 +54,11 @@ class Settings(BaseSettings):
     GROQ_API_KEY: Optional[str] = None
     GEMINI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
+    LLM_HTTP2: bool = True  # multiplex provider calls over HTTP/2 keep-alive connections
+    LLM_GROQ_MAX_CONNECTIONS: int = 20  # per API worker
+    LLM_GROQ_MAX_KEEPALIVE: int = 10
+    LLM_GEMINI_MAX_CONNECTIONS: int = 20
+    LLM_GEMINI_MAX_KEEPALIVE: int = 10
     
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 100
@@ -60,6 +68,48 @@ class Settings(BaseSettings):
     MAX_PAYLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     REQUEST_TIMEOUT: int = 30  # seconds
     
+    # Redaction
+    REDACTION_MAX_CONTEXT_HITS: int = 50  # hits stored with context lines in pending:{id}
+    REDACTION_PLAN_CACHE_SIZE: int = 256  # compiled policy plans kept in the LRU
+    REDACTION_MEMO_ENABLED: bool = True  # reuse results for strings seen before under the same plan
+    REDACTION_MEMO_MAX_ENTRIES: int = 10000
+    REDACTION_MEMO_MAX_BYTES: int = 16 * 1024 * 1024  # approximate size budget of memoized results
+    REDACTION_MAX_DEPTH: int = 256  # deepest JSON nesting redact_json will walk
+    REDACTION_MAX_NODES: int = 1_000_000  # total JSON values redact_json will walk
+    REDACTION_STREAM_WINDOW: int = 256 * 1024  # characters redacted per window by redact_stream
+    REDACTION_STREAM_OVERLAP: int = 4096  # look-ahead per window; must exceed the longest expected match
+    REDACTION_NLP_BATCH_SIZE: int = 64  # string leaves per nlp.pipe batch
+    REDACTION_SPACY_MODEL: str = "en_core_web_sm"
+    REDACTION_SPACY_COMPONENTS: list[str] = ["ner"]  # all other pipes are disabled
+    REDACTION_NER_BACKEND: str = "inline"  # inline | process | sidecar
+    REDACTION_NER_PROCESSES: int = 4  # worker processes when backend is "process"
+    REDACTION_SIDECAR_SOCKET: str = "/tmp/bento-redaction.sock"  # Unix socket when backend is "sidecar"
+    REDACTION_SIDECAR_TIMEOUT: float = 5.0  # seconds per sidecar request before falling back in-process
+    REDACTION_SIDECAR_RETRY_AFTER: float = 5.0  # seconds to skip the sidecar after a failure
+    REDACTION_SIDECAR_BATCH_MS: float = 2.0  # micro-batch window in the sidecar
+    REDACTION_SIDECAR_MAX_BATCH: int = 512  # strings per sidecar batch
+    REDACTION_NER_PREFILTER: bool = True  # skip NER for leaves that cannot hold entities
+    REDACTION_NER_MIN_LENGTH: int = 3
+    REDACTION_WHITELIST_PATH: Optional[str] = None  # defaults to app/config/vocab/public_whitelist.txt
+    REDACTION_TRIGGERS_PATH: Optional[str] = None  # defaults to app/config/vocab/personal_triggers.txt
+    REDACTION_EXECUTOR_WORKERS: int = 2  # threads running redaction per API worker
+    REDACTION_EXECUTOR_QUEUE: int = 32  # jobs allowed to wait before new ones get 503
+    
+    # Auditor
+    AUDIT_CACHE_ENABLED: bool = True
+    AUDIT_CACHE_MAX_ENTRIES: int = 4096  # per-worker LRU tier
+    AUDIT_CACHE_TTL_VALID: int = 3600  # seconds; 0 disables caching VALID verdicts
+    AUDIT_CACHE_TTL_FLAGGED: int = 300  # FLAGGED / REJECTED verdicts expire sooner
+    AUDIT_CACHE_REDIS: bool = True  # share verdicts across workers through Redis
+    AUDIT_CACHE_REDIS_RETRY_AFTER: float = 30.0  # seconds to skip Redis after an error
+    AUDIT_PRE_ENABLED: bool = True  # local rules resolve obvious cases before the LLM (the injection guard always runs)
+    AUDIT_PRE_MAX_CHARS: int = 200_000  # payload text above this is FLAGGED without an LLM call
+    AUDIT_PRE_TOKEN_MAX_LENGTH: int = 64  # longest string still treated as a structured token
+    AUDIT_PRE_SIGNATURES_PATH: Optional[str] = None  # defaults to app/config/vocab/injection_signatures.txt
+    AUDIT_BATCH_ENABLED: bool = False  # evaluate concurrent audits sharing a policy prompt in one LLM call
+    AUDIT_BATCH_WINDOW_MS: float = 5.0  # how long the first audit in a batch waits for others
+    AUDIT_BATCH_MAX: int = 16  # payloads per batched call
+    
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"  # json or text
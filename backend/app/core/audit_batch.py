@@ -0,0 +1,124 @@
+"""
+Audit Micro-Batching
+Collects audit requests that share a policy prompt for a few milliseconds and
+evaluates them in one LLM call, so a burst of N audits costs one request (and
+one copy of the system prompt) instead of N.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.llm_client import LLMProviderError
+from app.core.logging import logger
+
+# evaluate_one(payload, policy_prompt) -> (result, cacheable)
+EvaluateOne = Callable[[Any, str], Awaitable[Tuple[Any, bool]]]
+# evaluate_many(payloads, policy_prompt) -> one result per payload, None where unusable
+EvaluateMany = Callable[[List[Any], str], Awaitable[List[Optional[Any]]]]
+
+
+class _Batch:
+    __slots__ = ("items", "timer")
+
+    def __init__(self):
+        self.items: List[Tuple[Any, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class AuditBatcher:
+    """
+    Groups submissions by policy prompt and flushes a group after `window_ms`
+    or once it holds `max_batch` payloads.
+
+    Items the batch response does not answer with a valid verdict (or all of
+    them, if the response is malformed) are retried one by one. A provider
+    error fails the whole batch instead, so a rate limit is not multiplied.
+    """
+
+    def __init__(
+        self,
+        evaluate_one: EvaluateOne,
+        evaluate_many: EvaluateMany,
+        window_ms: Optional[float] = None,
+        max_batch: Optional[int] = None,
+    ):
+        self.evaluate_one = evaluate_one
+        self.evaluate_many = evaluate_many
+        self.window_ms = settings.AUDIT_BATCH_WINDOW_MS if window_ms is None else window_ms
+        self.max_batch = max_batch or settings.AUDIT_BATCH_MAX
+        self._pending: Dict[str, _Batch] = {}
+        self._tasks = set()
+        self.batches = 0
+        self.batched_items = 0
+        self.retried_items = 0
+
+    async def submit(self, payload: Any, policy_prompt: str) -> Tuple[Any, bool]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.get(policy_prompt)
+        if batch is None:
+            batch = self._pending[policy_prompt] = _Batch()
+            batch.timer = loop.call_later(self.window_ms / 1000, self._flush, policy_prompt, batch)
+        batch.items.append((payload, future))
+        if len(batch.items) >= self.max_batch:
+            self._flush(policy_prompt, batch)
+        return await future
+
+    def _flush(self, policy_prompt: str, batch: _Batch):
+        if self._pending.get(policy_prompt) is not batch:
+            return  # already flushed by size
+        del self._pending[policy_prompt]
+        batch.timer.cancel()
+        task = asyncio.ensure_future(self._run(policy_prompt, batch.items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, policy_prompt: str, items: List[Tuple[Any, asyncio.Future]]):
+        # Callers that were cancelled while waiting are dropped
+        items = [(payload, future) for payload, future in items if not future.done()]
+        if not items:
+            return
+        if len(items) == 1:
+            await self._single(policy_prompt, *items[0])
+            return
+
+        self.batches += 1
+        self.batched_items += len(items)
+        try:
+            results = await self.evaluate_many([payload for payload, _ in items], policy_prompt)
+        except LLMProviderError as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except Exception as e:
+            logger.warning(f"Malformed audit batch response ({len(items)} items), retrying individually: {e}")
+            results = [None] * len(items)
+
+        retry = []
+        for (payload, future), result in zip(items, results):
+            if result is None:
+                retry.append((payload, future))
+            elif not future.done():
+                future.set_result((result, True))
+        if retry:
+            self.retried_items += len(retry)
+            await asyncio.gather(*(self._single(policy_prompt, payload, future) for payload, future in retry))
+
+    async def _single(self, policy_prompt: str, payload: Any, future: asyncio.Future):
+        try:
+            outcome = await self.evaluate_one(payload, policy_prompt)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "retried_items": self.retried_items,
+            "pending": sum(len(batch.items) for batch in self._pending.values()),
+        }
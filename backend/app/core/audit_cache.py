@@ -0,0 +1,109 @@
+"""
+Audit Verdict Cache
+Reuses auditor verdicts for a redacted payload already checked against the
+same policy prompt and model. Two tiers: a per-worker LRU and Redis, shared
+by every worker. VALID and FLAGGED/REJECTED verdicts expire separately.
+"""
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.config.constants import CacheKeys
+from app.core.cache import LRUCache, get_redis_client
+from app.core.logging import logger
+
+
+def canonical_json(payload: Any) -> str:
+    """Key-order and whitespace independent JSON text"""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class AuditVerdictCache:
+    """
+    Two-tier verdict cache.
+
+    Values are AuditResult dicts; callers decide what is cacheable (the
+    fail-secure error verdicts never are). After a Redis error the Redis tier
+    is skipped for AUDIT_CACHE_REDIS_RETRY_AFTER seconds.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.local = LRUCache(maxsize or settings.AUDIT_CACHE_MAX_ENTRIES, name="audit_verdicts")
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self.stores = 0
+        self._redis_down_until = 0.0
+
+    @staticmethod
+    def key(payload: Any, policy_prompt: str, model: str) -> str:
+        return CacheKeys.audit_verdict(
+            _digest(canonical_json(payload)), _digest(policy_prompt or ""), _digest(model)
+        )
+
+    @staticmethod
+    def ttl_for(verdict: str) -> int:
+        return settings.AUDIT_CACHE_TTL_VALID if verdict == "VALID" else settings.AUDIT_CACHE_TTL_FLAGGED
+
+    def _redis_enabled(self) -> bool:
+        return settings.AUDIT_CACHE_REDIS and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception):
+        self.redis_errors += 1
+        self._redis_down_until = time.monotonic() + settings.AUDIT_CACHE_REDIS_RETRY_AFTER
+        logger.warning(f"Audit cache Redis error, using local tier only: {e}")
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.local.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if time.monotonic() < expires_at:
+                return dict(value)
+        if not self._redis_enabled():
+            return None
+        try:
+            r = await get_redis_client()
+            async with r.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.ttl(key)
+                raw, ttl = await pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        if not raw:
+            return None
+        value = json.loads(raw)
+        self.redis_hits += 1
+        if ttl and ttl > 0:
+            self.local.set(key, (time.monotonic() + ttl, value))
+        return dict(value)
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        ttl = self.ttl_for(value.get("verdict", ""))
+        if ttl <= 0:
+            return
+        self.stores += 1
+        self.local.set(key, (time.monotonic() + ttl, dict(value)))
+        if not self._redis_enabled():
+            return
+        try:
+            r = await get_redis_client()
+            await r.setex(key, ttl, json.dumps(value))
+        except Exception as e:
+            self._redis_failed(e)
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.local.stats(),
+            "redis_hits": self.redis_hits,
+            "redis_errors": self.redis_errors,
+            "stores": self.stores,
+        }
@@ -1,10 +1,16 @@
 import os
 import json
-from groq import Groq
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional
 from dotenv import load_dotenv
 from pydantic import BaseModel, ValidationError
 
+from app.config import settings
+from app.core.audit_batch import AuditBatcher
+from app.core.audit_cache import AuditVerdictCache
+from app.core.llm_client import GroqProvider
+from app.core.pre_audit import PreAuditor, allows_structured, blocked_terms
+from app.core.singleflight import SingleFlight
+
 load_dotenv()
 
 # Default System Prompt for Compliance
@@ -32,6 +38,16 @@ PASS if:
 - Data is clean, structured, and business-relevant.
 """
 
+# Appended to the policy prompt when several payloads are audited in one call
+BATCH_INSTRUCTIONS = """
+
+IMPORTANT: You will receive several payloads, each prefixed with its index in brackets.
+Evaluate each payload independently against the policy.
+You must output a valid JSON object of the form:
+{"results": [{"index": int, "verdict": "VALID" | "FLAGGED" | "REJECTED", "compliance_score": float, "reasoning": "string"}]}
+with exactly one entry per payload index.
+"""
+
 class AuditResult(BaseModel):
     verdict: str
     compliance_score: float
@@ -39,21 +55,33 @@ class AuditResult(BaseModel):
 
 class GroqAuditor:
     def __init__(self):
-        api_key = os.environ.get("GROQ_API_KEY")
-        if not api_key:
+        self.api_key = os.environ.get("GROQ_API_KEY")
+        if not self.api_key:
             print("Warning: GROQ_API_KEY not found. Auditor will run in MOCK mode.")
-            self.client = None
-        else:
-            self.client = Groq(api_key=api_key)
-            
         self.model = "llama-3.3-70b-versatile"
+        self.provider = GroqProvider(self.api_key)
+        self.pre_auditor = PreAuditor()
+        self.verdict_cache = AuditVerdictCache()
+        self.batcher = AuditBatcher(self._evaluate, self._evaluate_batch)
+        self.inflight = SingleFlight("audit")
 
-    def audit_payload(self, payload: Dict[str, Any], policy_prompt: str = DEFAULT_SYSTEM_PROMPT) -> AuditResult:
+    async def audit_payload(
+        self,
+        payload: Dict[str, Any],
+        policy_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        cache: bool = True,
+        policy_config: Optional[Dict[str, Any]] = None,
+    ) -> AuditResult:
         """
         Sends the payload to Groq (Llama 3) for compliance evaluation.
         Returns a Pydantic AuditResult model.
+
+        The local pre-audit rules run first (competitor / codename lists come
+        from `policy_config`); Groq only sees payloads they abstain on.
+        Verdicts for the same payload, policy prompt and model are reused from
+        the verdict cache unless `cache` is False (per-policy opt-out).
         """
-        if not self.client:
+        if not self.provider.configured:
             # Mock Response for testing without API Key
             return AuditResult(
                 verdict="VALID",
@@ -62,56 +90,28 @@ class GroqAuditor:
             )
 
         try:
-            # 0. Prompt Injection / Jailbreak Guard (Simple Heuristic)
-            payload_str = json.dumps(payload).lower()
-            if "ignore all previous instructions" in payload_str or "ignore your instructions" in payload_str:
+            # 0. Local pre-audit: injection signatures, blocked terms, size and
+            # shape. The injection guard runs even when the tier is disabled.
+            default_policy = policy_prompt == DEFAULT_SYSTEM_PROMPT
+            local = self.pre_auditor.evaluate(
+                payload,
+                blocked_terms(policy_config, default=default_policy),
+                allow_structured=allows_structured(default_policy, policy_config),
+                guards_only=not settings.AUDIT_PRE_ENABLED,
+            )
+            if local is not None:
                 return AuditResult(
-                    verdict="REJECTED",
-                    compliance_score=0.0,
-                    reasoning="[THREAT] JAILBREAK_ATTEMPT_DETECTED: Prompt Injection pattern match."
+                    verdict=local.verdict,
+                    compliance_score=local.compliance_score,
+                    reasoning=local.reasoning
                 )
 
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": policy_prompt + "\n\nIMPORTANT: You must output a valid JSON object with keys: verdict, compliance_score, reasoning."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Evaluate this payload:\n{json.dumps(payload, indent=2)}"
-                    }
-                ],
-                model=self.model,
-                temperature=0.1,
-                response_format={"type": "json_object"}
+            # Identical audits already in flight share one cache lookup / LLM call
+            cache_key = self.verdict_cache.key(payload, policy_prompt, self.model)
+            use_cache = cache and settings.AUDIT_CACHE_ENABLED
+            return await self.inflight.do(
+                (cache_key, use_cache), lambda: self._audit_remote(cache_key, payload, policy_prompt, use_cache)
             )
-            
-            response_content = chat_completion.choices[0].message.content
-            
-            # Validate with Pydantic
-            try:
-                parsed_json = json.loads(response_content)
-                
-                # Heuristic: Fix common hallucinated keys
-                if "evaluation" in parsed_json and "reasoning" not in parsed_json:
-                    parsed_json["reasoning"] = parsed_json["evaluation"]
-                if "status" in parsed_json and "verdict" not in parsed_json:
-                    parsed_json["verdict"] = parsed_json["status"].upper()
-                if "score" in parsed_json and "compliance_score" not in parsed_json:
-                    parsed_json["compliance_score"] = float(parsed_json["score"])
-                
-                return AuditResult(**parsed_json)
-            except (json.JSONDecodeError, ValidationError) as e:
-                print(f"Validation Error: {e}")
-                print(f"Raw Response: {response_content}") # Log raw response for debugging
-                
-                # Fail-Secure: If output is malformed, we flag it.
-                return AuditResult(
-                    verdict="FLAGGED",
-                    compliance_score=0.0,
-                    reasoning=f"AI Output Verification Failed. Raw Output: {response_content[:100]}..."
-                )
 
         except Exception as e:
             print(f"Auditing Error: {e}")
@@ -122,4 +122,107 @@ class GroqAuditor:
                 reasoning=f"Auditor System Error: {str(e)}"
             )
 
+    async def _audit_remote(
+        self, cache_key: str, payload: Dict[str, Any], policy_prompt: str, use_cache: bool
+    ) -> AuditResult:
+        """Verdict cache, then Groq (single or batched); caches well-formed verdicts"""
+        if use_cache:
+            cached = await self.verdict_cache.get(cache_key)
+            if cached is not None:
+                return AuditResult(**cached)
+
+        if settings.AUDIT_BATCH_ENABLED:
+            result, cacheable = await self.batcher.submit(payload, policy_prompt)
+        else:
+            result, cacheable = await self._evaluate(payload, policy_prompt)
+
+        # Only well-formed model verdicts are cached, never the fail-secure ones
+        if use_cache and cacheable:
+            await self.verdict_cache.set(cache_key, result.model_dump())
+        return result
+
+    @staticmethod
+    def _parse_verdict(parsed_json: Dict[str, Any]) -> AuditResult:
+        # Heuristic: Fix common hallucinated keys
+        if "evaluation" in parsed_json and "reasoning" not in parsed_json:
+            parsed_json["reasoning"] = parsed_json["evaluation"]
+        if "status" in parsed_json and "verdict" not in parsed_json:
+            parsed_json["verdict"] = parsed_json["status"].upper()
+        if "score" in parsed_json and "compliance_score" not in parsed_json:
+            parsed_json["compliance_score"] = float(parsed_json["score"])
+        return AuditResult(**parsed_json)
+
+    async def _evaluate(self, payload: Dict[str, Any], policy_prompt: str) -> Tuple[AuditResult, bool]:
+        """One payload, one LLM call. Returns (result, cacheable)"""
+        response_content, _ = await self.provider.chat(
+            messages=[
+                {
+                    "role": "system",
+                    "content": policy_prompt + "\n\nIMPORTANT: You must output a valid JSON object with keys: verdict, compliance_score, reasoning."
+                },
+                {
+                    "role": "user",
+                    "content": f"Evaluate this payload:\n{json.dumps(payload, indent=2)}"
+                }
+            ],
+            model=self.model,
+            temperature=0.1,
+            json_mode=True
+        )
+        
+        # Validate with Pydantic
+        try:
+            return self._parse_verdict(json.loads(response_content)), True
+        except (json.JSONDecodeError, ValidationError, AttributeError, TypeError, ValueError) as e:
+            print(f"Validation Error: {e}")
+            print(f"Raw Response: {response_content}") # Log raw response for debugging
+            
+            # Fail-Secure: If output is malformed, we flag it.
+            return AuditResult(
+                verdict="FLAGGED",
+                compliance_score=0.0,
+                reasoning=f"AI Output Verification Failed. Raw Output: {response_content[:100]}..."
+            ), False
+
+    async def _evaluate_batch(self, payloads: List[Dict[str, Any]], policy_prompt: str) -> List[Optional[AuditResult]]:
+        """
+        Several payloads under one policy prompt in a single LLM call.
+        Returns one result per payload, None where the response has no valid verdict;
+        raises ValueError if the response is not the expected JSON object.
+        """
+        items = "\n\n".join(f"[{i}]\n{json.dumps(payload, indent=2)}" for i, payload in enumerate(payloads))
+        response_content, _ = await self.provider.chat(
+            messages=[
+                {"role": "system", "content": policy_prompt + BATCH_INSTRUCTIONS},
+                {"role": "user", "content": f"Evaluate each of these {len(payloads)} payloads independently:\n\n{items}"}
+            ],
+            model=self.model,
+            temperature=0.1,
+            json_mode=True
+        )
+        entries = json.loads(response_content).get("results")
+        if not isinstance(entries, list):
+            raise ValueError("batch response has no results list")
+
+        results: List[Optional[AuditResult]] = [None] * len(payloads)
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            index = entry.pop("index", None)
+            if not isinstance(index, int) or not 0 <= index < len(payloads) or results[index] is not None:
+                continue
+            try:
+                results[index] = self._parse_verdict(entry)
+            except (ValidationError, AttributeError, TypeError, ValueError):
+                pass
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pre_audit": self.pre_auditor.stats(),
+            "verdict_cache": self.verdict_cache.stats(),
+            "batching": self.batcher.stats(),
+            "singleflight": self.inflight.stats(),
+        }
+
 auditor = GroqAuditor()
@@ -1,15 +1,87 @@
 """
-Redis Caching Utilities
-Decorators and utilities for caching with Redis
+Caching Utilities
+Decorators and utilities for caching with Redis, plus a bounded in-process LRU
 """
 import json
+import threading
+from collections import OrderedDict
 import redis.asyncio as redis
 from functools import wraps
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, Hashable, Optional
 import os
 from app.core.logging import logger
 
 
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with hit/miss counters.
+
+    Args:
+        maxsize: Maximum number of entries
+        name: Label used in stats()
+        max_bytes: Optional budget for the summed `size` of all entries
+    """
+
+    def __init__(self, maxsize: int = 128, name: str = "lru", max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.name = name
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._data: OrderedDict = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value, _ = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, size: int = 0) -> None:
+        """Store `value`; `size` counts against max_bytes (entries larger than the budget are skipped)"""
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
 # Redis client singleton
 _redis_client: Optional[redis.Redis] = None
 
@@ -0,0 +1,126 @@
+"""
+Bounded Executors
+Run CPU-bound work (redaction) off the asyncio event loop with a capped queue
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+
+from app.config import settings
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when an executor's queue is full and new work is rejected"""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded backlog and basic metrics.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more wait
+    for a thread; anything beyond that is rejected immediately with
+    ExecutorSaturatedError instead of piling up behind a large scan.
+
+    Args:
+        name: Label used for thread names and metrics
+        max_workers: Number of worker threads
+        max_queue: Jobs allowed to wait for a free worker
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0  # queued + running
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def _execute(self, enqueued_at: float, func: Callable, *args, **kwargs) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            self._active += 1
+            waited = started - enqueued_at
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+                self._run_total += time.perf_counter() - started
+        return result
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run `func(*args, **kwargs)` on the pool and await its result"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(f"{self.name} executor is saturated")
+            self._pending += 1
+            self._submitted += 1
+        call = partial(self._execute, time.perf_counter(), func, *args, **kwargs)
+        try:
+            job = self._pool.submit(call)
+        except RuntimeError:
+            # Pool already shut down - the job never started, release its slot
+            with self._lock:
+                self._pending -= 1
+            raise
+        # The slot is released when the job is done, including when it is
+        # cancelled while still queued (the awaiting caller went away) and
+        # never runs at all
+        job.add_done_callback(self._release)
+        return await asyncio.wrap_future(job)
+
+    def _release(self, job):
+        with self._lock:
+            self._pending -= 1
+            if job.cancelled():
+                self._cancelled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._pending - self._active,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+                "avg_wait_ms": round(self._wait_total / completed * 1000, 3),
+                "max_wait_ms": round(self._wait_max * 1000, 3),
+                "avg_run_ms": round(self._run_total / completed * 1000, 3),
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+# Shared executor for redaction work
+redaction_executor = BoundedExecutor(
+    "redaction",
+    max_workers=settings.REDACTION_EXECUTOR_WORKERS,
+    max_queue=settings.REDACTION_EXECUTOR_QUEUE,
+)
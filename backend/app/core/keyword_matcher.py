@@ -0,0 +1,183 @@
+"""
+Keyword Matcher
+Case-insensitive Aho-Corasick automaton for matching many literal keywords in one pass
+"""
+import hashlib
+from bisect import bisect_left
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Sequence, Union
+
+
+def fold_case(text: str) -> str:
+    """
+    Lowercase `text` without changing its length, so offsets in the folded
+    copy map 1:1 onto the original. Characters whose lowercase form expands
+    (e.g. 'İ') are kept as-is.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+def load_keywords(path: Union[str, Path]) -> list[str]:
+    """
+    Read a vocabulary file: one entry per line, blank lines and lines
+    starting with '#' are ignored. Entries are case-folded and de-duplicated
+    in file order.
+    """
+    keywords = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = fold_case(line.strip())
+            if entry and not entry.startswith("#") and entry not in seen:
+                seen.add(entry)
+                keywords.append(entry)
+    return keywords
+
+
+def keyword_fingerprint(keywords: Sequence[str]) -> str:
+    """Stable fingerprint of an ordered keyword list"""
+    return hashlib.sha1("\x1f".join(keywords).encode("utf-8")).hexdigest()
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over case-folded keywords.
+
+    Keywords keep their original order: `finditer` reports, for each keyword
+    in turn, the same leftmost non-overlapping matches that
+    `re.finditer(re.escape(keyword), re.IGNORECASE)` would, and `scan` mirrors
+    substituting the keywords one after another.
+    """
+
+    def __init__(self, keywords: Sequence[str]):
+        # Drop empties and case-insensitive duplicates, keeping first occurrence
+        seen = set()
+        self.keywords: list[str] = []
+        for keyword in keywords:
+            folded = fold_case(keyword)
+            if keyword and folded not in seen:
+                seen.add(folded)
+                self.keywords.append(keyword)
+        self.fingerprint = keyword_fingerprint(self.keywords)
+        self.max_length = max((len(k) for k in self.keywords), default=0)
+
+        # goto[state] maps a character to the next state; output[state] lists
+        # the keyword indexes that end at that state (including via fail links)
+        self._goto: list[dict[str, int]] = [{}]
+        self._output: list[list[int]] = [[]]
+        for idx, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in fold_case(keyword):
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._output.append([])
+                state = nxt
+            self._output[state].append(idx)
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in self._goto[f]:
+                    f = fail[f]
+                candidate = self._goto[f].get(ch, 0)
+                fail[nxt] = candidate if candidate != nxt else 0
+                self._output[nxt] = self._output[nxt] + self._output[fail[nxt]]
+        self._fail = fail
+
+    def iter_occurrences(self, text: str) -> Iterator[tuple[int, int, int]]:
+        """Yield every (start, end, keyword_index) occurrence, overlaps included"""
+        if not self.keywords:
+            return
+        goto, fail, output, keywords = self._goto, self._fail, self._output, self.keywords
+        state = 0
+        for pos, ch in enumerate(fold_case(text)):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                end = pos + 1
+                for idx in output[state]:
+                    yield end - len(keywords[idx]), end, idx
+
+    def contains_any(self, text: str) -> bool:
+        """True if any keyword occurs in `text` (stops at the first match)"""
+        return next(self.iter_occurrences(text), None) is not None
+
+    def _occurrences_by_keyword(self, text: str) -> list[tuple[int, list[tuple[int, int]]]]:
+        """(keyword_index, occurrences) for keywords present in `text`, in keyword order"""
+        # Occurrences arrive ordered by end; for a single keyword that is also
+        # start order. Only keywords that occur get a list, so the cost does
+        # not grow with the size of the vocabulary.
+        per_keyword: dict[int, list[tuple[int, int]]] = {}
+        for start, end, idx in self.iter_occurrences(text):
+            per_keyword.setdefault(idx, []).append((start, end))
+        return sorted(per_keyword.items())
+
+    @staticmethod
+    def _leftmost_non_overlapping(occurrences: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        selected = []
+        last_end = 0
+        for start, end in occurrences:
+            if start >= last_end:
+                selected.append((start, end))
+                last_end = end
+        return selected
+
+    def finditer(self, text: str) -> list[tuple[int, int, int]]:
+        """
+        Per-keyword leftmost non-overlapping matches, ordered by keyword then
+        position - the matches a loop of `re.finditer` calls would produce.
+        """
+        return [
+            (start, end, idx)
+            for idx, occurrences in self._occurrences_by_keyword(text)
+            for start, end in self._leftmost_non_overlapping(occurrences)
+        ]
+
+    def scan(self, text: str) -> tuple[list[tuple[int, int, int]], list[tuple[int, int]]]:
+        """
+        Reproduce applying the keywords one after another with `re.sub`.
+
+        Returns (matches, spans):
+        - matches: per-keyword re.finditer matches on `text`, reported only for
+          keywords that still occurred once earlier keywords were replaced
+        - spans: sorted, non-overlapping (start, end) ranges that end up replaced
+        """
+        matches = []
+        starts: list[int] = []
+        spans: list[tuple[int, int]] = []
+        for idx, occurrences in self._occurrences_by_keyword(text):
+            # Occurrences that survived the replacements of earlier keywords
+            surviving = []
+            for start, end in occurrences:
+                i = bisect_left(starts, start)
+                if (i == 0 or spans[i - 1][1] <= start) and (i == len(spans) or spans[i][0] >= end):
+                    surviving.append((start, end))
+            if not surviving:
+                continue
+            matches.extend((start, end, idx) for start, end in self._leftmost_non_overlapping(occurrences))
+            for start, end in self._leftmost_non_overlapping(surviving):
+                i = bisect_left(starts, start)
+                starts.insert(i, start)
+                spans.insert(i, (start, end))
+        return matches, spans
+
+
+@lru_cache(maxsize=256)
+def compile_keyword_automaton(keywords: tuple) -> KeywordAutomaton:
+    """Build (or reuse) the automaton for an ordered keyword set"""
+    return KeywordAutomaton(keywords)
@@ -0,0 +1,188 @@
+"""
+Async LLM Providers
+Thin async clients for the Groq and Gemini REST APIs. Each provider keeps one
+pooled httpx.AsyncClient (HTTP/2 with keep-alive) per event loop, so LLM calls
+never block the worker and concurrent requests share warm connections.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import settings
+from app.config.constants import TimeConstants
+from app.core.logging import logger
+
+
+class LLMProviderError(RuntimeError):
+    """Provider returned an error status or a response we cannot read"""
+
+
+# Every provider created in this process, closed together on shutdown
+_providers: List["AsyncProvider"] = []
+
+
+class AsyncProvider:
+    """
+    Base class: a lazily created httpx.AsyncClient with per-provider limits.
+
+    Args:
+        name: Provider name used in logs and stats
+        base_url: API root every request path is relative to
+        api_key: Provider key; the provider is unusable without one
+        max_connections: Connections open at once (further requests queue)
+        max_keepalive: Idle connections kept warm between requests
+        timeout: Seconds per request, defaults to TimeConstants.LLM_TIMEOUT
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        api_key: Optional[str],
+        max_connections: int,
+        max_keepalive: int,
+        timeout: float = TimeConstants.LLM_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.timeout = httpx.Timeout(timeout, connect=TimeConstants.DATABASE_TIMEOUT)
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.failures = 0
+        _providers.append(self)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def headers(self) -> Dict[str, str]:
+        return {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled client bound to the running loop (connections cannot cross loops)"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers(),
+                http2=settings.LLM_HTTP2 and self.transport is None,
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+            self._loop = loop
+        return self._client
+
+    async def post(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        self.requests += 1
+        try:
+            response = await self.client.post(path, json=body)
+        except httpx.HTTPError as e:
+            self.failures += 1
+            raise LLMProviderError(f"{self.name} request failed: {e!r}") from e
+        if response.status_code >= 400:
+            self.failures += 1
+            raise LLMProviderError(f"{self.name} returned {response.status_code}: {response.text[:200]}")
+        try:
+            return response.json()
+        except ValueError as e:
+            self.failures += 1
+            raise LLMProviderError(f"{self.name} returned invalid JSON") from e
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "configured": self.configured,
+            "requests": self.requests,
+            "failures": self.failures,
+            "http_version": "HTTP/2" if settings.LLM_HTTP2 else "HTTP/1.1",
+        }
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            try:
+                await self._client.aclose()
+            except RuntimeError:
+                # Client belongs to a loop that has already closed
+                pass
+        self._client = None
+        self._loop = None
+
+
+class GroqProvider(AsyncProvider):
+    """OpenAI-compatible chat completions on api.groq.com"""
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        super().__init__(
+            "groq",
+            "https://api.groq.com/openai/v1",
+            api_key,
+            max_connections=kwargs.pop("max_connections", settings.LLM_GROQ_MAX_CONNECTIONS),
+            max_keepalive=kwargs.pop("max_keepalive", settings.LLM_GROQ_MAX_KEEPALIVE),
+            **kwargs,
+        )
+
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.1,
+        json_mode: bool = False,
+    ) -> Tuple[str, int]:
+        """Returns (message content, total tokens)"""
+        body: Dict[str, Any] = {"model": model, "messages": messages, "temperature": temperature}
+        if json_mode:
+            body["response_format"] = {"type": "json_object"}
+        data = await self.post("/chat/completions", body)
+        try:
+            content = data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMProviderError(f"groq response has no message: {str(data)[:200]}") from e
+        return content, (data.get("usage") or {}).get("total_tokens", 0)
+
+
+class GeminiProvider(AsyncProvider):
+    """generateContent on the Gemini REST API"""
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        super().__init__(
+            "gemini",
+            "https://generativelanguage.googleapis.com/v1beta",
+            api_key,
+            max_connections=kwargs.pop("max_connections", settings.LLM_GEMINI_MAX_CONNECTIONS),
+            max_keepalive=kwargs.pop("max_keepalive", settings.LLM_GEMINI_MAX_KEEPALIVE),
+            **kwargs,
+        )
+
+    def headers(self) -> Dict[str, str]:
+        return {"x-goog-api-key": self.api_key or ""}
+
+    async def generate(self, prompt: str, model: str) -> Tuple[str, Optional[int]]:
+        """Returns (response text, total tokens or None when not reported)"""
+        data = await self.post(f"/models/{model}:generateContent", {"contents": [{"parts": [{"text": prompt}]}]})
+        try:
+            parts = data["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMProviderError(f"gemini response has no candidates: {str(data)[:200]}") from e
+        text = "".join(part.get("text", "") for part in parts)
+        return text, (data.get("usageMetadata") or {}).get("totalTokenCount")
+
+
+def provider_stats() -> Dict[str, Dict[str, Any]]:
+    return {provider.name: provider.stats() for provider in _providers}
+
+
+async def close_providers():
+    """Close the pooled connections of every provider (app shutdown)"""
+    for provider in _providers:
+        await provider.aclose()
+    logger.info("LLM provider pools closed")
@@ -0,0 +1,39 @@
+"""
+Process Memory
+Unique vs shared memory of a process, read from /proc/<pid>/smaps_rollup (Linux)
+"""
+from typing import Dict, Union
+
+# smaps_rollup fields we report (values are in kB)
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def process_memory(pid: Union[int, str] = "self") -> Dict[str, float]:
+    """
+    Memory breakdown of a process in MB:
+    - rss: resident set size
+    - pss: proportional share (shared pages divided among the processes using them)
+    - shared: pages also mapped by other processes (e.g. copy-on-write from a preforking master)
+    - unique: pages only this process holds
+
+    Returns an empty dict where /proc is unavailable.
+    """
+    values: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in SMAPS_FIELDS:
+                    values[name] = int(rest.split()[0])
+    except (OSError, ValueError):
+        return {}
+
+    def mb(kb: int) -> float:
+        return round(kb / 1024, 1)
+
+    return {
+        "rss": mb(values.get("Rss", 0)),
+        "pss": mb(values.get("Pss", 0)),
+        "shared": mb(values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0)),
+        "unique": mb(values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)),
+    }
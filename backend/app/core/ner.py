@@ -0,0 +1,141 @@
+"""
+NER Pipeline
+Loading, self-check and an optional process-pool backend for the spaCy NER stage
+"""
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    import spacy
+
+
+def load_ner_pipeline(model: str = None, components: list[str] = None) -> Optional["spacy.language.Language"]:
+    """
+    Load the spaCy model with only the components redaction needs.
+    Redaction only reads doc.ents, so by default everything except "ner"
+    (tagger, parser, attribute_ruler, lemmatizer, ...) is excluded: never
+    loaded at all, rather than loaded and disabled. The excluded names are
+    kept in meta["excluded"] for the self-check.
+    """
+    import spacy  # deferred: importing spaCy alone takes ~1s
+    from spacy import util
+
+    model = model or settings.REDACTION_SPACY_MODEL
+    components = components if components is not None else settings.REDACTION_SPACY_COMPONENTS
+    try:
+        path = util.get_package_path(model) if util.is_package(model) else model
+        meta = util.get_model_meta(path)
+        excluded = [name for name in meta.get("components") or meta.get("pipeline") or [] if name not in components]
+        pipeline = spacy.load(model, exclude=excluded)
+        pipeline.meta["excluded"] = excluded
+        return pipeline
+    except OSError:
+        print(f"SpaCy model not found. Run 'python -m spacy download {model}'")
+        return None
+
+
+def ner_self_check(pipeline: Optional["spacy.language.Language"], target_tokens: int = 1000) -> Dict[str, Any]:
+    """
+    Report the active pipeline components and the time each takes per 1k tokens.
+    Run once at startup so the CPU cost of the trimmed pipeline is visible in logs.
+    """
+    if pipeline is None:
+        return {"model": None, "active": [], "disabled": [], "ms_per_1k_tokens": {}}
+
+    sample = "Alice Smith from Initech emailed the Berlin office about the Q3 launch. "
+    doc = pipeline.make_doc(sample)
+    sample = sample * max(1, target_tokens // max(1, len(doc)))
+
+    timings = {}
+    start = time.perf_counter()
+    doc = pipeline.make_doc(sample)
+    timings["tokenizer"] = time.perf_counter() - start
+    for name, component in pipeline.pipeline:
+        start = time.perf_counter()
+        doc = component(doc)
+        timings[name] = time.perf_counter() - start
+
+    scale = 1000 / max(1, len(doc))
+    return {
+        "model": f"{pipeline.meta.get('lang', '')}_{pipeline.meta.get('name', '')}",
+        "active": list(pipeline.pipe_names),
+        "disabled": list(pipeline.disabled) + list(pipeline.meta.get("excluded", [])),
+        "tokens": len(doc),
+        "ms_per_1k_tokens": {name: round(elapsed * 1000 * scale, 3) for name, elapsed in timings.items()},
+    }
+
+
+# ============================================================================
+# PROCESS-POOL BACKEND
+# ============================================================================
+
+# Pipeline owned by a pool worker process, loaded once by _init_worker
+_worker_nlp = None
+
+
+def _init_worker(model: str, components: list[str]):
+    global _worker_nlp
+    _worker_nlp = load_ner_pipeline(model, components)
+
+
+def _extract_batch(texts: list[str], batch_size: int) -> list[list[tuple[int, int, str]]]:
+    """Runs inside a worker: NER over a batch, returned as (start, end, label) tuples"""
+    if _worker_nlp is None:
+        return [[] for _ in texts]
+    return [
+        [(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents]
+        for doc in _worker_nlp.pipe(texts, batch_size=batch_size)
+    ]
+
+
+def _worker_self_check() -> Dict[str, Any]:
+    return ner_self_check(_worker_nlp)
+
+
+class NERProcessPool:
+    """
+    Process pool for the NER stage.
+
+    spaCy inference holds the GIL, so threads cannot spread it across cores.
+    Each worker process loads the model once at start-up; texts travel to the
+    workers in batches over the pool's pipes and entities come back as compact
+    (start, end, label) tuples rather than Doc objects.
+
+    Args:
+        processes: Number of worker processes
+        model: spaCy model name or path
+        components: Pipeline components to enable in each worker
+        batch_size: Texts per nlp.pipe batch (and max texts per task)
+    """
+
+    def __init__(self, processes: int, model: str = None, components: list[str] = None, batch_size: int = None):
+        self.processes = processes
+        self.batch_size = batch_size or settings.REDACTION_NLP_BATCH_SIZE
+        self._pool = ProcessPoolExecutor(
+            max_workers=processes,
+            # spawn: never fork a process that already runs threads / an event loop
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model or settings.REDACTION_SPACY_MODEL, components if components is not None else settings.REDACTION_SPACY_COMPONENTS),
+        )
+
+    def entities(self, texts: list[str]) -> list[list[tuple[int, int, str]]]:
+        """NER spans per text; batches are spread over all worker processes"""
+        if not texts:
+            return []
+        chunk = max(1, min(self.batch_size, math.ceil(len(texts) / self.processes)))
+        batches = [texts[i:i + chunk] for i in range(0, len(texts), chunk)]
+        results = self._pool.map(_extract_batch, batches, [self.batch_size] * len(batches))
+        return [spans for batch in results for spans in batch]
+
+    def self_check(self) -> Dict[str, Any]:
+        """ner_self_check() as seen from inside a worker process"""
+        return self._pool.submit(_worker_self_check).result()
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,251 @@
+"""
+Pre-Audit Rules
+Deterministic checks that run before the LLM auditor. Each rule either returns
+a confident verdict or abstains (None); only payloads every rule abstains on
+are sent to Groq.
+
+Rules, in order:
+    injection      known jailbreak / prompt-injection phrases      -> REJECTED
+    blocked_terms  competitor and codename lists of the policy       -> FLAGGED
+    size           payloads too large to audit reliably              -> FLAGGED
+    structured     no free text (ids, enums, numbers, short tokens)  -> VALID
+                   unless a value looks like PII or a credential; only
+                   for policies that allow it (see PreAuditContext)
+
+The injection rule is a guard: it runs even when AUDIT_PRE_ENABLED is off.
+"""
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from pydantic import BaseModel
+
+from app.config import settings, RegexPatterns
+from app.core.keyword_matcher import compile_keyword_automaton, load_keywords
+
+VOCAB_DIR = Path(__file__).resolve().parent.parent / "config" / "vocab"
+
+# Terms named by the default auditor prompt
+DEFAULT_BLOCKED_TERMS = ("competitor_X", "Project: Manhattan")
+
+# policy_config keys holding term lists for the blocked_terms rule
+BLOCKED_TERM_KEYS = ("competitors", "codenames", "blocked_terms")
+
+# policy_config key opting a custom policy into the structured VALID shortcut
+STRUCTURED_OPT_IN_KEY = "pre_audit_structured"
+
+# Rules that run even when the pre-audit tier is disabled
+GUARD_RULES = ("injection",)
+
+# A string leaf "without free text": one short token, no whitespace, no '@'
+STRUCTURED_TOKEN = re.compile(r"[^\s@]*")
+
+# Values a structured payload is never approved with: anything the redaction
+# detectors would catch, and credential shapes the redaction toggles may
+# have left in place
+SENSITIVE_VALUE = re.compile("|".join(f"(?:{p})" for p in (
+    RegexPatterns.EMAIL,
+    RegexPatterns.PHONE,
+    RegexPatterns.CREDIT_CARD,
+    RegexPatterns.SSN,
+    RegexPatterns.API_KEY,
+    RegexPatterns.SECRET_TOKEN,
+)))
+PASSWORD_LIKE = re.compile(RegexPatterns.PASSWORD_LIKE)
+
+
+class PreAuditVerdict(BaseModel):
+    verdict: str
+    compliance_score: float
+    reasoning: str
+
+
+def blocked_terms(policy_config: Optional[Dict[str, Any]], default: bool = False) -> tuple:
+    """Competitor / codename terms of a policy (plus the default prompt's terms when `default`)"""
+    terms = list(DEFAULT_BLOCKED_TERMS) if default else []
+    for key in BLOCKED_TERM_KEYS:
+        terms.extend(term for term in (policy_config or {}).get(key) or [] if isinstance(term, str))
+    return tuple(terms)
+
+
+def allows_structured(default_policy: bool, policy_config: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether the structured rule may approve payloads without the LLM: under
+    the default policy, or a custom policy that opts in. A custom prompt can
+    forbid anything, so it is never assumed.
+    """
+    return default_policy or bool((policy_config or {}).get(STRUCTURED_OPT_IN_KEY))
+
+
+class PreAuditContext:
+    """
+    One payload under audit; string leaves and dict keys are collected once
+    and shared by all rules. `allow_structured` enables the structured VALID
+    shortcut (see allows_structured).
+    """
+
+    def __init__(self, payload: Any, terms: Sequence[str] = (), allow_structured: bool = False):
+        self.payload = payload
+        self.terms = tuple(terms)
+        self.allow_structured = allow_structured
+        self._strings: Optional[List[str]] = None
+
+    @property
+    def strings(self) -> List[str]:
+        if self._strings is None:
+            self._strings = list(self._walk())
+        return self._strings
+
+    def _walk(self) -> Iterator[str]:
+        stack = [self.payload]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif isinstance(node, dict):
+                for key, value in node.items():
+                    if isinstance(key, str):
+                        yield key
+                    stack.append(value)
+            elif isinstance(node, (list, tuple)):
+                stack.extend(node)
+
+    @property
+    def chars(self) -> int:
+        return sum(len(text) for text in self.strings)
+
+
+# A rule takes the context and returns a verdict, or None to abstain
+Rule = Callable[[PreAuditContext], Optional[PreAuditVerdict]]
+
+
+def _normalized(text: str) -> str:
+    return " ".join(text.split())
+
+
+def injection_rule(signatures: Sequence[str]) -> Rule:
+    automaton = compile_keyword_automaton(tuple(signatures))
+
+    def check(ctx: PreAuditContext) -> Optional[PreAuditVerdict]:
+        for text in ctx.strings:
+            match = next(automaton.iter_occurrences(_normalized(text)), None)
+            if match is not None:
+                signature = automaton.keywords[match[2]]
+                return PreAuditVerdict(
+                    verdict="REJECTED",
+                    compliance_score=0.0,
+                    reasoning=f"[THREAT] JAILBREAK_ATTEMPT_DETECTED: Prompt Injection pattern match ('{signature}').",
+                )
+        return None
+
+    return check
+
+
+def blocked_terms_rule(ctx: PreAuditContext) -> Optional[PreAuditVerdict]:
+    if not ctx.terms:
+        return None
+    automaton = compile_keyword_automaton(ctx.terms)
+    for text in ctx.strings:
+        match = next(automaton.iter_occurrences(text), None)
+        if match is not None:
+            return PreAuditVerdict(
+                verdict="FLAGGED",
+                compliance_score=0.0,
+                reasoning=f"Policy violation: payload mentions blocked term '{automaton.keywords[match[2]]}'.",
+            )
+    return None
+
+
+def size_rule(ctx: PreAuditContext) -> Optional[PreAuditVerdict]:
+    if ctx.chars > settings.AUDIT_PRE_MAX_CHARS:
+        return PreAuditVerdict(
+            verdict="FLAGGED",
+            compliance_score=0.0,
+            reasoning=f"Payload text exceeds {settings.AUDIT_PRE_MAX_CHARS} characters and cannot be audited automatically.",
+        )
+    return None
+
+
+def structured_rule(ctx: PreAuditContext) -> Optional[PreAuditVerdict]:
+    if not ctx.allow_structured:
+        return None
+    if not ctx.strings:
+        return None  # nothing to judge the payload by
+    max_length = settings.AUDIT_PRE_TOKEN_MAX_LENGTH
+    for text in ctx.strings:
+        if len(text) > max_length or not STRUCTURED_TOKEN.fullmatch(text):
+            return None
+        if SENSITIVE_VALUE.search(text) or PASSWORD_LIKE.fullmatch(text):
+            return None
+    return PreAuditVerdict(
+        verdict="VALID",
+        compliance_score=1.0,
+        reasoning="Structured payload without free text (ids, enums, numbers).",
+    )
+
+
+class PreAuditor:
+    """
+    Ordered rule list with counters. Rules can be added with `register`
+    (appended, or inserted at `index`).
+    """
+
+    def __init__(self, rules: Optional[List[tuple]] = None):
+        if rules is None:
+            signatures = load_keywords(settings.AUDIT_PRE_SIGNATURES_PATH or VOCAB_DIR / "injection_signatures.txt")
+            rules = [
+                ("injection", injection_rule(signatures)),
+                ("blocked_terms", blocked_terms_rule),
+                ("size", size_rule),
+                ("structured", structured_rule),
+            ]
+        self.rules: List[tuple] = list(rules)
+        self._lock = threading.Lock()
+        self.evaluated = 0
+        self.abstained = 0
+        self.resolved: Dict[str, int] = {}
+
+    def register(self, name: str, rule: Rule, index: Optional[int] = None):
+        entry = (name, rule)
+        if index is None:
+            self.rules.append(entry)
+        else:
+            self.rules.insert(index, entry)
+
+    def evaluate(
+        self,
+        payload: Any,
+        terms: Sequence[str] = (),
+        allow_structured: bool = False,
+        guards_only: bool = False,
+    ) -> Optional[PreAuditVerdict]:
+        """
+        First confident verdict from the rules, or None if all abstain.
+        With `guards_only` only the GUARD_RULES run (pre-audit tier disabled).
+        """
+        ctx = PreAuditContext(payload, terms, allow_structured)
+        result = None
+        for name, rule in self.rules:
+            if guards_only and name not in GUARD_RULES:
+                continue
+            result = rule(ctx)
+            if result is not None:
+                break
+        with self._lock:
+            self.evaluated += 1
+            if result is None:
+                self.abstained += 1
+            else:
+                self.resolved[name] = self.resolved.get(name, 0) + 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        resolved = sum(self.resolved.values())
+        return {
+            "evaluated": self.evaluated,
+            "resolved": resolved,
+            "abstained": self.abstained,
+            "by_rule": dict(self.resolved),
+            "resolved_rate": round(resolved / self.evaluated, 4) if self.evaluated else 0.0,
+        }
@@ -94,6 +94,7 @@ async def fetch_active_profile_config(
             "redact_location": profile.get("redact_location", True),
             "redact_credentials": profile.get("redact_credentials", True),
             "custom_keywords": profile.get("custom_keywords") or [],
+            "cache_audit": profile.get("cache_audit", True),  # reuse cached auditor verdicts
             # Auto-generate auditor prompt based on profile
             "auditor_prompt": (
                 f"You are a compliance officer for the '{profile['name']}' privacy context. "
@@ -1,16 +1,286 @@
 import re
 import json
-from typing import Any, Dict, Union
-import spacy
+import hashlib
+import threading
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
 
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("SpaCy model not found. Run 'python -m spacy download en_core_web_sm'")
-    nlp = None
+from app.config import settings, RegexPatterns
+from app.core.cache import LRUCache
+from app.core.keyword_matcher import compile_keyword_automaton, fold_case, load_keywords
+from app.core.ner import NERProcessPool, load_ner_pipeline, ner_self_check
+from app.core.sidecar import SidecarClient, SidecarError
+
+VOCAB_DIR = Path(__file__).resolve().parent.parent / "config" / "vocab"
+
+# In-process pipeline, used when NER runs inline in this process (or as the
+# sidecar backend's fallback). Loaded on first use - the startup self-check
+# triggers it for the inline backend - never at import.
+nlp = None
+_nlp_lock = threading.Lock()
+_nlp_attempted = False
+
+
+def get_ner_pipeline():
+    """Return the inline spaCy pipeline, loading it once on first call (None if unavailable)"""
+    global nlp, _nlp_attempted
+    if nlp is None and not _nlp_attempted:
+        with _nlp_lock:
+            if nlp is None and not _nlp_attempted:
+                nlp = load_ner_pipeline()
+                _nlp_attempted = True
+    return nlp
+
+
+@lru_cache(maxsize=128)
+def compile_scanner(detectors: tuple) -> Optional[re.Pattern]:
+    """
+    Combine regex detectors into a single alternation.
+    Each detector becomes a named group; alternatives are tried in order, so
+    earlier detectors win when two match at the same offset.
+
+    Args:
+        detectors: Ordered (key, pattern_source) pairs for the enabled detectors
+    """
+    if not detectors:
+        return None
+    return re.compile("|".join(f"(?P<{key}>{source})" for key, source in detectors))
+
+class LineIndex:
+    """
+    Newline-offset index over a single text.
+    Built lazily on the first query, then every offset -> line lookup is a
+    bisect and context lines are sliced straight out of the source text.
+
+    For a window of a larger stream, `start` is the absolute offset of
+    text[0] and `first_line` its line number; all offsets and line numbers
+    taken and returned are then absolute.
+    """
+
+    def __init__(self, text: str, start: int = 0, first_line: int = 1):
+        self.text = text
+        self.start = start
+        self.first_line = first_line
+        self._newlines: Optional[list[int]] = None
+
+    @property
+    def newlines(self) -> list[int]:
+        if self._newlines is None:
+            offsets = []
+            find = self.text.find
+            pos = find("\n")
+            while pos != -1:
+                offsets.append(pos)
+                pos = find("\n", pos + 1)
+            self._newlines = offsets
+        return self._newlines
+
+    @property
+    def line_count(self) -> int:
+        return len(self.newlines) + 1
+
+    def slice(self, start: int, end: int) -> str:
+        """Text between two (absolute) offsets"""
+        return self.text[start - self.start:end - self.start]
+
+    def line_number(self, offset: int) -> int:
+        """Line number (1-indexed) for a character offset"""
+        return bisect_left(self.newlines, offset - self.start) + self.first_line
+
+    def line(self, line_idx: int) -> str:
+        """Return line `line_idx` (0-indexed) without splitting the whole text"""
+        newlines = self.newlines
+        line_idx -= self.first_line - 1
+        if line_idx < 0 or line_idx > len(newlines):
+            return ""
+        start = newlines[line_idx - 1] + 1 if line_idx > 0 else 0
+        end = newlines[line_idx] if line_idx < len(newlines) else len(self.text)
+        return self.text[start:end]
+
+    def context(self, line_idx: int) -> dict:
+        """Extract ±2 lines of context around line `line_idx` (0-indexed)"""
+        first = self.first_line - 1
+        last = first + self.line_count
+        return {
+            "before": [self.line(i) for i in range(max(first, line_idx - 2), line_idx)],
+            "match": self.line(line_idx),
+            "after": [self.line(i) for i in range(line_idx + 1, min(last, line_idx + 3))]
+        }
+
+class Hit:
+    """
+    Compact record of a single detection.
+    Holds offsets into the text it was found in; the matched value, line number
+    and surrounding context lines are only materialized when asked for.
+    """
+    __slots__ = ("type", "start", "end", "_index", "_line_number")
+
+    def __init__(self, type: str, start: int, end: int, index: LineIndex):
+        self.type = type
+        self.start = start
+        self.end = end
+        self._index = index
+        self._line_number: Optional[int] = None
+
+    @property
+    def value(self) -> str:
+        return self._index.slice(self.start, self.end)
+
+    @property
+    def line_number(self) -> int:
+        if self._line_number is None:
+            self._line_number = self._index.line_number(self.start)
+        return self._line_number
+
+    @property
+    def context(self) -> dict:
+        return self._index.context(self.line_number - 1)
+
+    def to_dict(self, include_context: bool = True) -> dict:
+        """Serialize to the JSON shape stored in Redis and returned to clients"""
+        data = {
+            "type": self.type,
+            "value": self.value,
+            "line_number": self.line_number,
+        }
+        if include_context:
+            data["context"] = self.context
+        return data
+
+    def __repr__(self) -> str:
+        return f"Hit(type={self.type!r}, start={self.start}, end={self.end})"
+
+
+def serialize_hits(hits: list[Hit], max_context_hits: Optional[int] = None) -> list[dict]:
+    """
+    Serialize hits for storage, attaching context lines to the first
+    `max_context_hits` only (None = no cap). Later hits keep type/value/line.
+    """
+    if max_context_hits is None:
+        max_context_hits = len(hits)
+    return [hit.to_dict(include_context=i < max_context_hits) for i, hit in enumerate(hits)]
+
+
+def resolve_spans(taken: list[tuple], candidates: Iterable[tuple]) -> list[tuple]:
+    """
+    Merge lower-priority `candidates` into the spans already `taken`.
+    Both are (start, end, ...) tuples sorted by start. Overlapping spans
+    become one span covering all of them, typed by the highest-priority one
+    (taken before candidates, earlier candidates first), so every detection
+    is redacted in full.
+    Returns: sorted, non-overlapping merged spans
+    """
+    ranked = sorted(
+        [(span[0], 0, i, span) for i, span in enumerate(taken)]
+        + [(span[0], 1, i, span) for i, span in enumerate(candidates)]
+    )
+    merged = []
+    ranks = []  # priority of the span that gave merged[i] its type
+    for start, *rank, span in ranked:
+        if merged and start < merged[-1][1]:
+            last = merged[-1]
+            winner = span if rank < ranks[-1] else last
+            merged[-1] = (last[0], max(last[1], span[1]), *winner[2:])
+            ranks[-1] = min(ranks[-1], rank)
+        else:
+            merged.append(span)
+            ranks.append(rank)
+    return merged
+
+def merge_ranges(ranges: Iterable[tuple]) -> list[tuple[int, int]]:
+    """Union of (start, end, ...) ranges as sorted, disjoint (start, end) pairs"""
+    merged: list[tuple[int, int]] = []
+    for start, end, *_ in sorted(ranges):
+        if merged and start < merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+# Leaf shapes that never contain named entities (whole-string matches)
+NER_SKIP_SHAPES = re.compile(
+    "|".join(f"(?:{p})" for p in (
+        RegexPatterns.UUID,
+        RegexPatterns.HEX,
+        RegexPatterns.NUMBER,
+        RegexPatterns.ISO_TIMESTAMP,
+        RegexPatterns.BASE64,
+    )),
+    re.IGNORECASE,
+)
+CAPITALIZED_WORD = re.compile(RegexPatterns.CAPITALIZED_WORD)
+
+
+# Synthetic Data Maps (Simple deterministic list for demo)
+SYNTHETIC_MAP = {
+    "PERSON": ["Alex", "Jordan", "Taylor", "Morgan", "Casey"],
+    "ORG": ["Acme Corp", "Globex", "Initech", "Umbrella Corp", "Stark Ind"],
+    "GPE": ["Springfield", "Gotham", "Metropolis", "Atlantis", "Wakanda"],
+    "EMAIL": ["user@example.com", "contact@sample.org", "info@demo.net"],
+    "PHONE": ["+1-555-0123", "555-0199", "555-0100"]
+}
+
+# Entity labels the NER stage can redact
+NER_LABELS = ("PERSON", "ORG", "GPE")
+
+# How far back from an entity the personal-trigger check looks
+PERSONAL_CONTEXT_CHARS = 50
+
+# user_profiles toggles that stand in for an engine redact_* key when the
+# engine key itself is absent (e.g. a raw user_profiles row)
+PROFILE_TOGGLE_ALIASES = {
+    "credit_card": "redact_payment",
+    "api_key": "redact_credentials",
+    "person": "redact_names",
+    "gpe": "redact_location",
+}
+
+
+def is_enabled(config: Dict[str, Any], key: str) -> bool:
+    """Whether detector / entity `key` is enabled; defaults to True"""
+    flag = f"redact_{key}"
+    if flag in config:
+        return bool(config[flag])
+    alias = PROFILE_TOGGLE_ALIASES.get(key)
+    return bool(config.get(alias, True)) if alias else True
+
+
+class PayloadLimitError(ValueError):
+    """Raised when a JSON payload is nested deeper or has more nodes than allowed"""
+
+
+class RedactionPlan:
+    """
+    A policy configuration compiled for redaction.
+    Holds the pre-built matchers, the enabled NER labels and the replacement
+    strategy, so per-leaf redaction does no config parsing.
+    """
+
+    def __init__(self, fingerprint: str, mode: str, scanner: Optional[re.Pattern], automaton, ner_labels: frozenset, key: str = ""):
+        self.key = key  # canonical description the plan was compiled from (see plan_key)
+        self.fingerprint = fingerprint
+        self.mode = mode
+        self.scanner = scanner
+        self.automaton = automaton
+        self.ner_labels = ner_labels
+
+    def replacement(self, key: str, seed: int) -> str:
+        """
+        Replacement for a span of type `key`. In swap mode `seed` (the length
+        of the whole original text) picks the synthetic value.
+        """
+        if key == "CUSTOM_KEYWORD":
+            return "PROJECT_X" if self.mode == "swap" else "[REDACTED]" # Generic swap
+        label = key.upper()
+        if self.mode == "swap":
+            options = SYNTHETIC_MAP.get(label, ["DATA"])
+            return options[seed % len(options)]
+        return f"[{label}_REDACTED]"
 
 class RedactionService:
-    def __init__(self):
+    def __init__(self, ner_backend: Optional[str] = None):
         self.patterns = {
             "email": re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
             "phone": re.compile(r'\b(?:\+?1?[-.]?\(?\d{3}\)?[-.]?)?\d{3}[-.]?\d{4}\b'),
@@ -19,185 +289,562 @@ class RedactionService:
             "ssn": re.compile(r'\b\d{3}-\d{2}-\d{4}\b')
         }
         
-        # Local list of famous entities/locations to skip redaction
-        self.public_whitelist = {
-            "madrid", "london", "paris", "new york", "mumbai", "tokyo", "berlin", 
-            "google", "apple", "microsoft", "amazon", "meta", "nvidia",
-            "python", "javascript", "react", "nextjs",
-            "elon musk", "bill gates", "steve jobs", "narendra modi", "openai", "groq", "bento"
+        # Famous entities/locations to skip redaction, and phrases that make
+        # the text before an entity personal. Both are loaded from vocabulary
+        # files so they can grow without slowing down the per-entity check.
+        self.public_whitelist = frozenset(load_keywords(settings.REDACTION_WHITELIST_PATH or VOCAB_DIR / "public_whitelist.txt"))
+        self.personal_triggers = load_keywords(settings.REDACTION_TRIGGERS_PATH or VOCAB_DIR / "personal_triggers.txt")
+        self.trigger_automaton = compile_keyword_automaton(tuple(self.personal_triggers))
+
+        self._plans = LRUCache(maxsize=settings.REDACTION_PLAN_CACHE_SIZE, name="redaction_plans")
+
+        # Content-addressed memo of finished results (see _redact_many)
+        self._memo: Optional[LRUCache] = None
+        if settings.REDACTION_MEMO_ENABLED:
+            self._memo = LRUCache(
+                maxsize=settings.REDACTION_MEMO_MAX_ENTRIES,
+                name="redaction_memo",
+                max_bytes=settings.REDACTION_MEMO_MAX_BYTES,
+            )
+
+        # Optional out-of-process NER (see REDACTION_NER_BACKEND): a process
+        # pool owned by this service, or a shared sidecar serving every worker
+        self.ner_backend = ner_backend or settings.REDACTION_NER_BACKEND
+        self.ner_pool: Optional[NERProcessPool] = None
+        self.sidecar: Optional[SidecarClient] = None
+        if self.ner_backend == "process":
+            self.ner_pool = NERProcessPool(settings.REDACTION_NER_PROCESSES)
+        elif self.ner_backend == "sidecar":
+            self.sidecar = SidecarClient(settings.REDACTION_SIDECAR_SOCKET)
+
+        # NER prefilter counters (see _ner_skip_reason)
+        self._gate_lock = threading.Lock()
+        self._ner_gate = {"checked": 0, "sent": 0, "skipped_short": 0, "skipped_no_capital": 0, "skipped_shape": 0}
+
+    @property
+    def ner_enabled(self) -> bool:
+        """
+        Whether NER can run in this process (the pool, or the inline pipeline,
+        loaded on first use). With the sidecar backend NER runs in the daemon
+        and this is only consulted when falling back.
+        """
+        return self.ner_pool is not None or get_ner_pipeline() is not None
+
+    def self_check(self) -> Dict[str, Any]:
+        """NER pipeline self-check for whichever backend is active"""
+        if self.sidecar is not None:
+            try:
+                report = self.sidecar.self_check()
+            except SidecarError as e:
+                # Don't load the model here; redaction falls back per request
+                report = {"model": None, "active": [], "disabled": [], "ms_per_1k_tokens": {}, "error": str(e)}
+        elif self.ner_pool is not None:
+            report = self.ner_pool.self_check()
+        else:
+            report = ner_self_check(get_ner_pipeline())
+        report["backend"] = self.ner_backend
+        return report
+
+    def after_fork(self):
+        """Re-create per-process resources in a worker forked from a preloaded master"""
+        if self.ner_pool is not None:
+            self.ner_pool = NERProcessPool(settings.REDACTION_NER_PROCESSES)
+        if self.sidecar is not None:
+            self.sidecar = SidecarClient(settings.REDACTION_SIDECAR_SOCKET)
+
+    def close(self):
+        if self.ner_pool is not None:
+            self.ner_pool.shutdown(wait=False)
+        if self.sidecar is not None:
+            self.sidecar.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters exposed on /metrics"""
+        with self._gate_lock:
+            gate = dict(self._ner_gate)
+        gate["skip_rate"] = round(1 - gate["sent"] / gate["checked"], 4) if gate["checked"] else 0.0
+        return {
+            "plans": self._plans.stats(),
+            "memo": self._memo.stats() if self._memo is not None else None,
+            "ner_gate": gate,
+            "sidecar": self.sidecar.stats() if self.sidecar is not None else None,
         }
-        
-        self.personal_triggers = {
-            "my", "live", "living", "staying", "home", "house", "address", 
-            "born", "from", "born in", "stay at", "stay in", "call me", "name is",
-            "reside", "apartment", "landmark", "work at", "office", "desk"
+
+    def plan_key(self, config: Optional[Dict[str, Any]], mode: str) -> str:
+        """Canonical description of everything in `config` that affects redaction"""
+        config = config or {}
+        relevant = {
+            "mode": mode,
+            "detectors": [key for key in self.patterns if is_enabled(config, key)],
+            "ner_labels": [label for label in NER_LABELS if is_enabled(config, label.lower())],
+            "custom_keywords": [keyword for keyword in config.get("custom_keywords") or [] if keyword],
         }
+        return json.dumps(relevant, sort_keys=True, separators=(",", ":"))
+
+    def compile_plan(self, config: Optional[Dict[str, Any]] = None, mode: str = "redact") -> RedactionPlan:
+        """
+        Compile (or fetch from the LRU) the plan for a policy_config or a
+        user_profiles row. Plans are keyed by a stable hash of the settings
+        that affect redaction, so equivalent configs share one plan.
+        """
+        return self.plan_from_key(self.plan_key(config, mode))
 
-    def redact_text(self, text: str, mode: str = "redact", config: Dict[str, Any] = None) -> tuple[str, list[dict]]:
+    def plan_from_key(self, key: str) -> RedactionPlan:
+        """Compile (or fetch from the LRU) the plan for a plan_key() string"""
+        fingerprint = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        plan = self._plans.get(fingerprint)
+        if plan is None:
+            relevant = json.loads(key)
+            scanner = compile_scanner(tuple((k, self.patterns[k].pattern) for k in relevant["detectors"]))
+            keywords = tuple(relevant["custom_keywords"])
+            automaton = compile_keyword_automaton(keywords) if keywords else None
+            plan = RedactionPlan(fingerprint, relevant["mode"], scanner, automaton, frozenset(relevant["ner_labels"]), key)
+            self._plans.set(fingerprint, plan)
+        return plan
+
+    def redact_text(self, text: str, mode: str = "redact", config: Dict[str, Any] = None, plan: Optional[RedactionPlan] = None) -> tuple[str, list[Hit]]:
         """
         Apply regex and NLP for redaction or synthetic swapping.
-        Returns: (redacted_text, list_of_detailed_hits)
+        Returns: (redacted_text, list_of_hits)
         
-        Each hit now includes:
+        Each Hit exposes:
         - type: str (e.g., "email", "PERSON")
         - value: str (original matched text)
         - line_number: int (1-indexed)
-        - context: dict with before/match/after lines
+        - context: dict with before/match/after lines (built on access)
+        Use serialize_hits() to turn them into JSON-ready dicts.
+
+        A pre-compiled `plan` takes precedence over `mode` / `config`.
         """
         if not isinstance(text, str):
             return text, []
             
-        hits = []
-        # Default config if None
-        if config is None:
-            config = {}
+        if plan is None:
+            plan = self.compile_plan(config, mode)
 
-        # Split text into lines for context extraction
-        lines = text.split('\n')
-        
-        def extract_context(line_idx: int, match_text: str) -> dict:
-            """Extract ±2 lines of context around a match"""
-            return {
-                "before": lines[max(0, line_idx-2):line_idx],
-                "match": lines[line_idx] if line_idx < len(lines) else "",
-                "after": lines[line_idx+1:min(len(lines), line_idx+3)]
-            }
-        
-        def find_line_number(original_text: str, match_start: int) -> int:
-            """Find line number (1-indexed) for a character position"""
-            return original_text[:match_start].count('\n') + 1
-
-        # Synthetic Data Maps (Simple deterministic list for demo)
-        synthetic_map = {
-            "PERSON": ["Alex", "Jordan", "Taylor", "Morgan", "Casey"],
-            "ORG": ["Acme Corp", "Globex", "Initech", "Umbrella Corp", "Stark Ind"],
-            "GPE": ["Springfield", "Gotham", "Metropolis", "Atlantis", "Wakanda"],
-            "EMAIL": ["user@example.com", "contact@sample.org", "info@demo.net"],
-            "PHONE": ["+1-555-0123", "555-0199", "555-0100"]
-        }
-        
-        # Helper for swapping
-        def get_swap(entity_type):
-            options = synthetic_map.get(entity_type, ["DATA"])
-            return options[len(text) % len(options)] 
+        return self._redact_many([text], plan)[0]
 
-        redacted_text = text
-        
-        # 0. Custom Keywords Redaction
-        custom_keywords = config.get("custom_keywords", [])
-        for keyword in custom_keywords:
-            if keyword and keyword.lower() in redacted_text.lower():
-                # Case insensitive replacement
-                pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-                for match in pattern.finditer(text): # Use original 'text' for accurate line numbers
-                    line_num = find_line_number(text, match.start())
-                    hits.append({
-                        "type": "CUSTOM_KEYWORD",
-                        "value": match.group(),
-                        "line_number": line_num,
-                        "context": extract_context(line_num - 1, match.group())
-                    })
-                
-                def replace_keyword(match):
-                    if mode == "swap":
-                        return "PROJECT_X" # Generic swap
-                    return "[REDACTED]"
-                redacted_text = pattern.sub(replace_keyword, redacted_text)
-
-        # 1. Regex Redaction first
-        for key, pattern in self.patterns.items():
-            # Check config: e.g. redact_email, redact_phone
-            # Default to True if config key missing
-            if not config.get(f"redact_{key}", True):
-                continue
+    def _memo_key(self, text: str, plan: RedactionPlan) -> tuple:
+        # Results also depend on which NER backend produced them; the inline
+        # pipeline is not loaded just for the key (sidecar fallback)
+        backend = id(self.ner_pool if self.ner_pool is not None else nlp)
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return digest, plan.fingerprint, plan.mode, backend
 
-            for match in pattern.finditer(text): # Use original 'text' for accurate line numbers
-                line_num = find_line_number(text, match.start())
-                hits.append({
-                    "type": key,
-                    "value": match.group(),
-                    "line_number": line_num,
-                    "context": extract_context(line_num - 1, match.group())
-                })
-            
-            def replace_match(match):
-                if mode == "swap":
-                    return get_swap(key.upper())
-                return f"[{key.upper()}_REDACTED]"
-            
-            redacted_text = pattern.sub(replace_match, redacted_text)
-        
-        # 2. NLP Redaction
-        # Config check for NLP categories? key logic: redact_person, redact_org, redact_gpe
-        if nlp:
-            doc = nlp(redacted_text)
-            for ent in reversed(doc.ents):
-                # Map spaCy label to lower key
-                label_key = ent.label_.lower() # person, org, gpe
-                
-                # Default behavior: Block all detected entities unless configured otherwise
-                if not config.get(f"redact_{label_key}", True):
-                     continue
-
-                # Smart Contextual Redaction Logic
-                start = ent.start_char
-                prefix = redacted_text[max(0, start - 50):start].lower()
-                is_personal = any(trigger in prefix for trigger in self.personal_triggers)
-                
-                # 1. Skip if it's a known public entity AND context is NOT personal
-                if ent.text.lower() in self.public_whitelist and not is_personal:
-                    continue 
-
-                # 2. Skip GPE (Locations) if context is NOT personal
-                if ent.label_ == "GPE" and not is_personal:
+    def _redact_many(self, texts: list[str], plan: RedactionPlan) -> list[tuple[str, list[Hit]]]:
+        """
+        Redact distinct strings under one plan. Returns (redacted_text, hits)
+        per string. With the sidecar backend the work is sent to the shared
+        redaction daemon; if it is unreachable, the strings are redacted in
+        this process instead (loading the NER model here on first use).
+        """
+        entries = None
+        if self.sidecar is not None:
+            try:
+                entries = self.sidecar.redact(texts, plan.key)
+            except SidecarError:
+                entries = None
+        if entries is None:
+            entries = self.redact_entries(texts, plan)
+        return [self._from_entry(text, entry) for text, entry in zip(texts, entries)]
+
+    def redact_entries(self, texts: list[str], plan: RedactionPlan) -> list[tuple[str, tuple]]:
+        """
+        In-process redaction of distinct strings under one plan. Returns an
+        entry per string: (redacted_text, ((type, start, end), ...)).
+
+        Strings already in the memo are served from it; the rest are scanned
+        by every detector and rewritten once. All detectors report spans on
+        the original string. Overlapping spans are merged and redacted in
+        full, under the type of the highest-priority one - custom keywords,
+        then regex detectors, then NER - and the output is built with a
+        single join.
+        """
+        entries: list[Optional[tuple[str, tuple]]] = [None] * len(texts)
+        misses = []  # (position, memo_key, line_index, spans, hits)
+        for i, text in enumerate(texts):
+            key = None
+            if self._memo is not None:
+                key = self._memo_key(text, plan)
+                entry = self._memo.get(key)
+                if entry is not None:
+                    entries[i] = entry
                     continue
+            misses.append((i, key, *self._scan_patterns(text, plan)))
 
-                if ent.label_ in ["PERSON", "ORG", "GPE"]:
-                    start = ent.start_char
-                    end = ent.end_char
-                    
-                    line_num = find_line_number(redacted_text, start)
-                    hits.append({
-                        "type": ent.label_,
-                        "value": ent.text,
-                        "line_number": line_num,
-                        "context": extract_context(line_num - 1, ent.text)
-                    })
-                    
-                    if mode == "swap":
-                        replacement = get_swap(ent.label_)
-                    else:
-                        replacement = f"[{ent.label_}_REDACTED]"
-                        
-                    redacted_text = redacted_text[:start] + replacement + redacted_text[end:]
-        
-        return redacted_text, hits
+        if self.ner_enabled and plan.ner_labels and misses:
+            entities = self._ner_entities([texts[miss[0]] for miss in misses])
+        else:
+            entities = [[]] * len(misses)
 
-    def redact_json(self, data: Union[Dict, list, str], mode: str = "mask", config: Dict[str, Any] = None) -> tuple[Any, list[str]]:
-        """Recursively traverse JSON and redact string values. Returns (redacted_data, all_hits)."""
-        all_hits = []
+        for (i, key, line_index, spans, hits), text_entities in zip(misses, entities):
+            text = texts[i]
+            if text_entities:
+                kept = self._filter_entities(text, text_entities, plan)
+                spans = resolve_spans(spans, kept)
+                hits.extend(Hit(label, start, end, line_index) for start, end, label in kept)
+            entry = (self._render(text, spans, plan), tuple((hit.type, hit.start, hit.end) for hit in hits))
+            if key is not None:
+                self._memo.set(key, entry, size=2 * len(entry[0]) + 64 * len(entry[1]) + 128)
+            entries[i] = entry
+        return entries
 
-        if isinstance(data, dict):
-            new_dict = {}
-            for k, v in data.items():
-                r_val, hits = self.redact_json(v, mode, config)
-                new_dict[k] = r_val
-                all_hits.extend(hits)
-            return new_dict, all_hits
-            
-        elif isinstance(data, list):
-            new_list = []
-            for item in data:
-                r_val, hits = self.redact_json(item, mode, config)
-                new_list.append(r_val)
-                all_hits.extend(hits)
-            return new_list, all_hits
-            
-        elif isinstance(data, str):
-            val, hits = self.redact_text(data, mode, config)
-            return val, hits
-            
+    @staticmethod
+    def _from_entry(text: str, entry: tuple) -> tuple[str, list[Hit]]:
+        """Rebuild (redacted_text, hits) for `text` from a redaction entry"""
+        redacted_text, spans = entry
+        line_index = LineIndex(text)
+        return redacted_text, [Hit(label, start, end, line_index) for label, start, end in spans]
+
+    def _scan_patterns(self, text: str, plan: RedactionPlan, line_index: Optional[LineIndex] = None, lo: int = 0) -> tuple[LineIndex, list[tuple[int, int, str]], list[Hit]]:
+        """
+        Keyword + regex stage. Returns (line_index, spans, hits) where spans
+        are the sorted, non-overlapping (start, end, type) ranges to replace.
+        Spans are relative to `text`; hits are offset by `line_index.start`.
+        Only matches starting at or after `lo` are found; text[:lo] is still
+        seen by the detectors as left context (word boundaries).
+
+        Every keyword and detector match is reported as a hit. A detector
+        match that overlaps a keyword is not dropped: the keyword's
+        replacement is stretched over it (see resolve_spans), so none of the
+        value stays in clear.
+        """
+        hits = []
+
+        # Offset -> line index shared by line numbers and context extraction
+        if line_index is None:
+            line_index = LineIndex(text)
+        base = line_index.start
+
+        # 0 + 1. Custom Keywords and Regex Redaction
+        # Keywords are matched by one Aho-Corasick automaton and all enabled
+        # regex detectors by one alternation.
+        spans = []
+        if plan.automaton is not None:
+            # Keywords are applied first and in order, so earlier keywords win overlaps
+            matches, claimed = plan.automaton.scan(text[lo:] if lo else text)
+            hits.extend(Hit("CUSTOM_KEYWORD", base + lo + start, base + lo + end, line_index) for start, end, _ in matches)
+            spans = [(lo + start, lo + end, "CUSTOM_KEYWORD") for start, end in claimed]
+
+        if plan.scanner is not None:
+            found = [(*match.span(), match.lastgroup) for match in plan.scanner.finditer(text, lo)]
+            spans = resolve_spans(spans, found)
+            hits.extend(Hit(key, base + start, base + end, line_index) for start, end, key in found)
+
+        return line_index, spans, hits
+
+    @staticmethod
+    def _render(text: str, spans: list[tuple[int, int, str]], plan: RedactionPlan, lo: int = 0, hi: Optional[int] = None, seed: Optional[int] = None) -> str:
+        """
+        Build the output in one join from resolved, non-overlapping spans.
+        `lo` / `hi` limit the output to text[lo:hi] (spans must lie inside).
+        `seed` is passed to plan.replacement() and defaults to len(text).
+        """
+        if hi is None:
+            hi = len(text)
+        if seed is None:
+            seed = len(text)
+        if not spans and lo == 0 and hi == len(text):
+            return text
+        pieces = []
+        cursor = lo
+        for start, end, key in spans:
+            pieces.append(text[cursor:start])
+            pieces.append(plan.replacement(key, seed))
+            cursor = end
+        pieces.append(text[cursor:hi])
+        return "".join(pieces)
+
+    @staticmethod
+    def _ner_skip_reason(text: str) -> Optional[str]:
+        """
+        Cheap gate in front of NER. Returns why `text` cannot contain an entity
+        (too short, no capitalized or all-caps word, UUID/hex/number/timestamp/
+        base64 shape) or None if it has to go through the model.
+        """
+        if len(text.strip()) < settings.REDACTION_NER_MIN_LENGTH:
+            return "skipped_short"
+        if not CAPITALIZED_WORD.search(text):
+            return "skipped_no_capital"
+        if NER_SKIP_SHAPES.fullmatch(text.strip()):
+            return "skipped_shape"
+        return None
+
+    def _ner_entities(self, texts: list[str]) -> list[list[tuple[int, int, str]]]:
+        """Run NER over `texts` in batches. Returns (start, end, label) spans per text."""
+        results: list[list[tuple[int, int, str]]] = [[] for _ in texts]
+        candidates = list(range(len(texts)))
+        if settings.REDACTION_NER_PREFILTER:
+            skipped: Dict[str, int] = {}
+            candidates = []
+            for i, text in enumerate(texts):
+                reason = self._ner_skip_reason(text)
+                if reason is None:
+                    candidates.append(i)
+                else:
+                    skipped[reason] = skipped.get(reason, 0) + 1
+            with self._gate_lock:
+                self._ner_gate["checked"] += len(texts)
+                self._ner_gate["sent"] += len(candidates)
+                for reason, count in skipped.items():
+                    self._ner_gate[reason] += count
+        if not candidates:
+            return results
+
+        batch = [texts[i] for i in candidates]
+        if self.ner_pool is not None:
+            entities = self.ner_pool.entities(batch)
         else:
+            entities = [
+                [(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents]
+                for doc in get_ner_pipeline().pipe(batch, batch_size=settings.REDACTION_NLP_BATCH_SIZE)
+            ]
+        for i, spans in zip(candidates, entities):
+            results[i] = spans
+        return results
+
+    def _trigger_index(self, text: str) -> tuple[list[int], list[int]]:
+        """
+        One automaton pass over `text` for personal triggers. Returns
+        occurrence end offsets (ascending) and, for each, the latest start of
+        any occurrence ending at or before it.
+        """
+        ends: list[int] = []
+        latest_starts: list[int] = []
+        latest = -1
+        for start, end, _ in self.trigger_automaton.iter_occurrences(text):
+            latest = max(latest, start)
+            ends.append(end)
+            latest_starts.append(latest)
+        return ends, latest_starts
+
+    def _filter_entities(self, text: str, entities: list[tuple[int, int, str]], plan: RedactionPlan) -> list[tuple[int, int, str]]:
+        """NER stage: keep the entities in `text` that the contextual rules say to redact"""
+        kept = []
+        triggers = None
+        for start, end, label in entities:
+            # Default behavior: Block PERSON / ORG / GPE unless configured otherwise
+            if label not in plan.ner_labels:
+                continue
+
+            # Smart Contextual Redaction Logic
+            # Personal if a trigger lies entirely within the PERSONAL_CONTEXT_CHARS
+            # characters before the entity (triggers are found in one scan per string)
+            if triggers is None:
+                triggers = self._trigger_index(text)
+            ends, latest_starts = triggers
+            i = bisect_right(ends, start)
+            is_personal = i > 0 and latest_starts[i - 1] >= start - PERSONAL_CONTEXT_CHARS
+
+            # 1. Skip if it's a known public entity AND context is NOT personal
+            if not is_personal and fold_case(text[start:end]) in self.public_whitelist:
+                continue 
+
+            # 2. Skip GPE (Locations) if context is NOT personal
+            if label == "GPE" and not is_personal:
+                continue
+
+            kept.append((start, end, label))
+        return kept
+
+    def redact_stream(self, chunks: Iterable[str], mode: str = "redact", config: Dict[str, Any] = None, plan: Optional[RedactionPlan] = None, total_length: Optional[int] = None) -> Iterator[tuple[str, list[Hit]]]:
+        """
+        Redact text of any size from an iterable of string chunks (a list,
+        a generator of slices, a text file object, ...).
+        Yields (redacted_chunk, hits); joining the chunks gives the redacted
+        text. Hit offsets and line numbers are absolute; their context lines
+        are limited to the current window.
+
+        Text is processed in windows of REDACTION_STREAM_WINDOW characters plus
+        REDACTION_STREAM_OVERLAP of look-ahead. A window's output stops at the
+        last whitespace before the look-ahead and never inside a match; the
+        rest is carried into the next window together with a little left
+        context, so memory stays bounded by the window size. Each window only
+        looks for matches from where the previous one stopped. Matches longer
+        than the overlap may be split.
+
+        Swap mode picks synthetic values by the length of the whole text, as
+        redact_text does; pass `total_length` when it is known to get the
+        same output (otherwise one fixed seed is used for every window).
+        """
+        if plan is None:
+            plan = self.compile_plan(config, mode)
+
+        window = settings.REDACTION_STREAM_WINDOW
+        overlap = settings.REDACTION_STREAM_OVERLAP
+        if plan.automaton is not None:
+            overlap = max(overlap, plan.automaton.max_length)
+
+        chunks = iter(chunks)
+        pending: list[str] = []  # received text not yet joined into `buffer`
+        pending_size = 0
+        buffer = ""  # already-emitted left context + text still to emit
+        head = 0  # buffer[:head] was emitted by the previous window
+        start = 0  # absolute offset of buffer[0]
+        first_line = 1  # line number of buffer[0]
+        exhausted = False
+        seed = total_length or 0
+        while True:
+            while not exhausted and len(buffer) - head + pending_size < window + overlap:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                elif chunk:
+                    pending.append(chunk)
+                    pending_size += len(chunk)
+            if pending:
+                buffer += "".join(pending)
+                pending, pending_size = [], 0
+            if head == len(buffer):
+                return
+
+            line_index = LineIndex(buffer, start, first_line)
+            commit, redacted, hits = self._redact_window(buffer, head, line_index, plan, overlap, final=exhausted, seed=seed)
+            yield redacted, hits
+
+            # Keep some already-emitted text as left context for the next window
+            keep = max(0, commit - PERSONAL_CONTEXT_CHARS)
+            first_line += buffer.count("\n", 0, keep)
+            start += keep
+            buffer = buffer[keep:]
+            head = commit - keep
+
+    def _redact_window(self, text: str, head: int, line_index: LineIndex, plan: RedactionPlan, overlap: int, final: bool, seed: int = 0) -> tuple[int, str, list[Hit]]:
+        """
+        Scan one stream window and emit text[head:commit].
+        Returns (commit, redacted_text, hits).
+
+        text[:head] was emitted by the previous window and is only context:
+        keywords and detectors are matched from `head` on, and an entity that
+        starts before `head` is redacted from `head` on.
+        """
+        base = line_index.start
+        _, spans, hits = self._scan_patterns(text, plan, line_index, head)
+        matched = [(hit.start - base, hit.end - base) for hit in hits]
+        if plan.ner_labels:
+            kept = [(max(s, head), e, label) for s, e, label in self._window_entities(text, plan) if e > head]
+            if kept:
+                spans = resolve_spans(spans, kept)
+                hits.extend(Hit(label, base + s, base + e, line_index) for s, e, label in kept)
+                matched.extend((s, e) for s, e, _ in kept)
+
+        commit = len(text)
+        if not final:
+            # Stop at the last whitespace before the look-ahead, then move out
+            # of any match that would be cut - replaced or only reported - so
+            # the next window starts scanning exactly where a full scan would
+            limit = max(head + 1, len(text) - overlap)
+            boundary = max(text.rfind(" ", head, limit), text.rfind("\n", head, limit))
+            commit = boundary + 1 if boundary >= head else limit
+            for s, e in merge_ranges(matched):
+                if s < commit < e:
+                    commit = s if s > head else e
+                    break
+
+        emitted = [(s, e, key) for s, e, key in spans if e <= commit]
+        lo, hi = base + head, base + commit
+        hits = [hit for hit in hits if lo <= hit.start < hi]
+        return commit, self._render(text, emitted, plan, head, commit, seed), hits
+
+    def _window_entities(self, text: str, plan: RedactionPlan) -> list[tuple[int, int, str]]:
+        """
+        Entities of a stream window that the contextual rules say to redact.
+        With the sidecar backend the window is sent to the daemon under the
+        NER-only version of `plan`, whose spans are exactly those entities.
+        """
+        if self.sidecar is not None:
+            relevant = json.loads(plan.key)
+            relevant["detectors"] = []
+            relevant["custom_keywords"] = []
+            try:
+                [(_, spans)] = self.sidecar.redact([text], json.dumps(relevant, sort_keys=True, separators=(",", ":")))
+                return [(start, end, label) for label, start, end in spans]
+            except SidecarError:
+                pass
+        if not self.ner_enabled:
+            return []
+        entities = self._ner_entities([text])[0]
+        return self._filter_entities(text, entities, plan) if entities else []
+
+    def redact_json(self, data: Union[Dict, list, str], mode: str = "mask", config: Dict[str, Any] = None, plan: Optional[RedactionPlan] = None) -> tuple[Any, list[Hit]]:
+        """
+        Traverse JSON and redact string values. Returns (redacted_data, all_hits).
+
+        Runs in two phases: the structure is walked iteratively while string
+        leaves are collected, then the distinct strings are redacted together
+        (memo lookups, detector scan, one batched NER call).
+
+        The result shares structure with `data`: only containers on the path
+        to a changed leaf are copied, and clean subtrees (or the whole input)
+        are returned as-is. Treat the result as read-only.
+
+        Raises PayloadLimitError beyond REDACTION_MAX_DEPTH / REDACTION_MAX_NODES.
+        """
+        if plan is None:
+            plan = self.compile_plan(config, mode)
+
+        if isinstance(data, str):
+            return self.redact_text(data, plan=plan)
+        if not isinstance(data, (dict, list)):
             return data, []
 
+        # Phase 1: walk the structure with an explicit stack, in document
+        # order. Containers are recorded as (node, parent, key_in_parent) and
+        # leaves as (container, key, position in `unique`); identical strings
+        # are redacted once.
+        max_depth = settings.REDACTION_MAX_DEPTH
+        max_nodes = settings.REDACTION_MAX_NODES
+        containers = [(data, None, None)]
+        leaves = []
+        unique: Dict[str, int] = {}
+        nodes = 1
+        stack = [(self._children(data), 0)]
+        while stack:
+            children, parent = stack[-1]
+            for key, value in children:
+                nodes += 1
+                if nodes > max_nodes:
+                    raise PayloadLimitError(f"payload has more than {max_nodes} nodes")
+                if isinstance(value, str):
+                    leaves.append((parent, key, unique.setdefault(value, len(unique))))
+                elif isinstance(value, (dict, list)):
+                    if len(stack) >= max_depth:
+                        raise PayloadLimitError(f"payload is nested deeper than {max_depth} levels")
+                    containers.append((value, parent, key))
+                    stack.append((self._children(value), len(containers) - 1))
+                    break
+            else:
+                stack.pop()
+
+        # Phase 2: redact the distinct strings and copy-on-write the
+        # containers that hold changed leaves
+        results = self._redact_many(list(unique), plan)
+
+        copies: Dict[int, Union[Dict, list]] = {}
+        all_hits = []
+        for container, key, position in leaves:
+            redacted_text, hits = results[position]
+            all_hits.extend(hits)
+            if redacted_text != containers[container][0][key]:
+                self._writable(container, containers, copies)[key] = redacted_text
+        return copies.get(0, data), all_hits
+
+    @staticmethod
+    def _children(node: Union[Dict, list]):
+        return iter(node.items()) if isinstance(node, dict) else enumerate(node)
+
+    @staticmethod
+    def _writable(index: int, containers: list[tuple], copies: Dict[int, Any]) -> Union[Dict, list]:
+        """Shallow-copy container `index` and its ancestors (once) and return the copy"""
+        path = []
+        while index is not None and index not in copies:
+            path.append(index)
+            index = containers[index][1]
+        for index in reversed(path):
+            node, parent, key = containers[index]
+            copies[index] = dict(node) if isinstance(node, dict) else list(node)
+            if parent is not None:
+                copies[parent][key] = copies[index]
+        return copies[path[0]] if path else copies[index]
+
 redactor = RedactionService()
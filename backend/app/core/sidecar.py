@@ -0,0 +1,372 @@
+"""
+Redaction Sidecar
+A standalone daemon that owns the NER model and compiled plans and redacts
+strings for every API worker in the pod over a Unix-domain socket.
+
+Workers keep the JSON traversal and only send the distinct string leaves of a
+payload; the daemon micro-batches requests arriving from different workers so
+the model sees one nlp.pipe call per batch.
+
+Usage:
+    python -m app.core.sidecar    # listens on settings.REDACTION_SIDECAR_SOCKET
+
+Wire format (all integers big-endian):
+    frame     = kind:u8  body_length:u32  body
+    REDACT    = str(plan_key)  count:u32  str(text) * count
+    RESULT    = type_count:u32  str(type) * type_count
+                count:u32  entry * count
+    entry     = changed:u8  [str(redacted_text) if changed]
+                span_count:u32  (type_index:u16 start:u32 end:u32) * span_count
+    ERROR     = utf-8 message
+    SELF_CHECK / REPORT = empty / JSON self-check report
+    str       = length:u32  utf-8 bytes
+"""
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+HEADER = struct.Struct("!BI")
+U32 = struct.Struct("!I")
+SPAN = struct.Struct("!HII")
+
+KIND_REDACT = 1
+KIND_RESULT = 2
+KIND_ERROR = 3
+KIND_SELF_CHECK = 4
+KIND_REPORT = 5
+
+
+class SidecarError(RuntimeError):
+    """The sidecar could not be reached or rejected a request"""
+
+
+# ============================================================================
+# Protocol
+# ============================================================================
+
+def _pack_str(parts: list, value: str):
+    data = value.encode("utf-8", "surrogatepass")
+    parts.append(U32.pack(len(data)))
+    parts.append(data)
+
+
+def _unpack_str(view: memoryview, pos: int) -> tuple[str, int]:
+    (length,) = U32.unpack_from(view, pos)
+    pos += U32.size
+    return bytes(view[pos:pos + length]).decode("utf-8", "surrogatepass"), pos + length
+
+
+def encode_request(plan_key: str, texts: list[str]) -> bytes:
+    parts: list[bytes] = []
+    _pack_str(parts, plan_key)
+    parts.append(U32.pack(len(texts)))
+    for text in texts:
+        _pack_str(parts, text)
+    return b"".join(parts)
+
+
+def decode_request(body: bytes) -> tuple[str, list[str]]:
+    view = memoryview(body)
+    plan_key, pos = _unpack_str(view, 0)
+    (count,) = U32.unpack_from(view, pos)
+    pos += U32.size
+    texts = []
+    for _ in range(count):
+        text, pos = _unpack_str(view, pos)
+        texts.append(text)
+    return plan_key, texts
+
+
+def encode_result(entries: list[tuple[str, tuple]], texts: list[str]) -> bytes:
+    """Encode redaction entries; unchanged strings are not sent back"""
+    types: Dict[str, int] = {}
+    body: list[bytes] = [U32.pack(len(entries))]
+    for (redacted_text, spans), text in zip(entries, texts):
+        if redacted_text == text:
+            body.append(b"\x00")
+        else:
+            body.append(b"\x01")
+            _pack_str(body, redacted_text)
+        body.append(U32.pack(len(spans)))
+        for label, start, end in spans:
+            body.append(SPAN.pack(types.setdefault(label, len(types)), start, end))
+    head: list[bytes] = [U32.pack(len(types))]
+    for label in types:
+        _pack_str(head, label)
+    return b"".join(head + body)
+
+
+def decode_result(body: bytes, texts: list[str]) -> list[tuple[str, tuple]]:
+    view = memoryview(body)
+    (type_count,) = U32.unpack_from(view, 0)
+    pos = U32.size
+    types = []
+    for _ in range(type_count):
+        label, pos = _unpack_str(view, pos)
+        types.append(label)
+    (count,) = U32.unpack_from(view, pos)
+    pos += U32.size
+    if count != len(texts):
+        raise SidecarError(f"sidecar returned {count} results for {len(texts)} strings")
+    entries = []
+    for text in texts:
+        changed = view[pos]
+        pos += 1
+        redacted_text = text
+        if changed:
+            redacted_text, pos = _unpack_str(view, pos)
+        (span_count,) = U32.unpack_from(view, pos)
+        pos += U32.size
+        spans = []
+        for _ in range(span_count):
+            type_index, start, end = SPAN.unpack_from(view, pos)
+            pos += SPAN.size
+            spans.append((types[type_index], start, end))
+        entries.append((redacted_text, tuple(spans)))
+    return entries
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("sidecar closed the connection")
+        received += n
+    return bytes(buffer)
+
+
+# ============================================================================
+# Client
+# ============================================================================
+
+class SidecarClient:
+    """
+    Blocking client used by RedactionService (one connection per thread).
+    After a failure the sidecar is skipped for REDACTION_SIDECAR_RETRY_AFTER
+    seconds so callers fall back immediately instead of waiting on timeouts.
+    """
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        self.path = path
+        self.timeout = timeout if timeout is not None else settings.REDACTION_SIDECAR_TIMEOUT
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self._requests = 0
+        self._failures = 0
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def _call(self, kind: int, body: bytes) -> tuple[int, bytes]:
+        if time.monotonic() < self._down_until:
+            raise SidecarError("sidecar unavailable (backing off)")
+        with self._lock:
+            self._requests += 1
+        try:
+            sock = self._connection()
+            sock.sendall(HEADER.pack(kind, len(body)))
+            sock.sendall(body)
+            reply_kind, length = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+            reply = _recv_exactly(sock, length)
+        except OSError as e:
+            self._drop_connection()
+            with self._lock:
+                self._failures += 1
+                self._down_until = time.monotonic() + settings.REDACTION_SIDECAR_RETRY_AFTER
+            raise SidecarError(f"sidecar unavailable: {e}") from e
+        if reply_kind == KIND_ERROR:
+            raise SidecarError(reply.decode("utf-8", "replace"))
+        return reply_kind, reply
+
+    def redact(self, texts: list[str], plan_key: str) -> list[tuple[str, tuple]]:
+        """Redaction entries for `texts` under the plan described by `plan_key`"""
+        if not texts:
+            return []
+        _, reply = self._call(KIND_REDACT, encode_request(plan_key, texts))
+        return decode_result(reply, texts)
+
+    def self_check(self) -> Dict[str, Any]:
+        _, reply = self._call(KIND_SELF_CHECK, b"")
+        return json.loads(reply)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"socket": self.path, "requests": self._requests, "failures": self._failures}
+
+    def close(self):
+        self._drop_connection()
+
+
+# ============================================================================
+# Server
+# ============================================================================
+
+class RedactionSidecar:
+    """
+    asyncio Unix-socket server around an in-process RedactionService.
+
+    Requests are queued and drained in micro-batches: the first request
+    opens a window of `batch_ms`, everything that arrives meanwhile (up to
+    `max_batch` strings) is grouped by plan and redacted in one call on a
+    single worker thread.
+    """
+
+    def __init__(self, path: str, service=None, batch_ms: Optional[float] = None, max_batch: Optional[int] = None):
+        if service is None:
+            from app.core.redaction import RedactionService
+            service = RedactionService(ner_backend="inline")
+        self.path = path
+        self.service = service
+        self.batch_window = (batch_ms if batch_ms is not None else settings.REDACTION_SIDECAR_BATCH_MS) / 1000
+        self.max_batch = max_batch or settings.REDACTION_SIDECAR_MAX_BATCH
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sidecar")
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # stale socket from a previous run
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        os.chmod(self.path, 0o600)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self._executor.shutdown(wait=False)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "redaction": self.service.stats(),
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+                body = await reader.readexactly(length)
+                try:
+                    if kind == KIND_REDACT:
+                        plan_key, texts = decode_request(body)
+                        future = loop.create_future()
+                        self.requests += 1
+                        await self._queue.put((plan_key, texts, future))
+                        reply_kind, reply = KIND_RESULT, encode_result(await future, texts)
+                    elif kind == KIND_SELF_CHECK:
+                        report = await loop.run_in_executor(self._executor, self.service.self_check)
+                        reply_kind, reply = KIND_REPORT, json.dumps(report).encode("utf-8")
+                    else:
+                        reply_kind, reply = KIND_ERROR, f"unknown message kind {kind}".encode("utf-8")
+                except Exception as e:
+                    reply_kind, reply = KIND_ERROR, f"{type(e).__name__}: {e}".encode("utf-8")
+                writer.write(HEADER.pack(reply_kind, len(reply)))
+                writer.write(reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # worker closed its connection
+        finally:
+            writer.close()
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][1])
+            deadline = loop.time() + self.batch_window
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[1])
+
+            self.batches += 1
+            self.texts += size
+            groups: Dict[str, list] = {}
+            for item in batch:
+                groups.setdefault(item[0], []).append(item)
+            for plan_key, items in groups.items():
+                texts = [text for _, item_texts, _ in items for text in item_texts]
+                try:
+                    entries = await loop.run_in_executor(self._executor, self._redact, plan_key, texts)
+                except Exception as e:
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                pos = 0
+                for _, item_texts, future in items:
+                    if not future.done():
+                        future.set_result(entries[pos:pos + len(item_texts)])
+                    pos += len(item_texts)
+
+    def _redact(self, plan_key: str, texts: list[str]) -> list[tuple[str, tuple]]:
+        """Redact a batch, running identical strings from different workers once"""
+        plan = self.service.plan_from_key(plan_key)
+        unique = list(dict.fromkeys(texts))
+        entries = dict(zip(unique, self.service.redact_entries(unique, plan)))
+        return [entries[text] for text in texts]
+
+
+def main():
+    from app.core.logging import logger
+
+    sidecar = RedactionSidecar(settings.REDACTION_SIDECAR_SOCKET)
+    report = sidecar.service.self_check()  # load the model before accepting work
+    logger.info(f"Redaction sidecar on {sidecar.path}: NER active={report['active']}")
+    asyncio.run(sidecar.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Single-Flight
+Coalesces identical concurrent async calls: while a call for a key is in
+flight, later callers with the same key await its result instead of starting
+their own. Used for provider calls (audits, LLM routing) that clients and load
+balancers retry while the first attempt is still running.
+"""
+import asyncio
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Per-key in-flight call registry.
+
+    - The call runs as its own task, so one caller being cancelled does not
+      cancel it for the others; it is cancelled only when every caller waiting
+      on it has been cancelled.
+    - A failure is raised to every caller of that flight, and the key is
+      released as soon as the call finishes, so the next call starts afresh.
+    - All callers of one flight receive the same result object; treat it as
+      read-only.
+
+    Args:
+        name: Label used in stats()
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(partial(self._finished, key, call))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Last interested caller is gone: stop the call and free the key now
+                self._release(key, call)
+                call.task.cancel()
+                self.cancelled += 1
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _release(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finished(self, key: Hashable, call: _Call, task: asyncio.Task):
+        self._release(key, call)
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "in_flight": len(self._calls),
+        }
@@ -2,20 +2,25 @@
 Database Connection Management
 Singleton pattern for Supabase client to enable connection pooling
 """
-from supabase import create_client, Client
 from functools import lru_cache
+from typing import TYPE_CHECKING
 import os
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 load_dotenv()
 
 
 @lru_cache(maxsize=1)
-def get_supabase_client() -> Client:
+def get_supabase_client() -> "Client":
     """
     Get singleton Supabase client instance
     Uses LRU cache to ensure only one client is created
     """
+    from supabase import create_client
+
     url = os.environ.get("SUPABASE_URL", "")
     key = os.environ.get("SUPABASE_KEY", "")
     
@@ -25,11 +30,21 @@ def get_supabase_client() -> Client:
     return create_client(url, key)
 
 
-# Singleton instance
-supabase = get_supabase_client()
+class LazySupabaseClient:
+    """
+    Stand-in for the shared client that creates it on first use, so importing
+    this module neither loads the SDK nor requires SUPABASE_* to be set.
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(get_supabase_client(), name)
+
 
+# Singleton instance (created on first attribute access)
+supabase: "Client" = LazySupabaseClient()
 
-def get_authenticated_client(jwt_token: str) -> Client:
+
+def get_authenticated_client(jwt_token: str) -> "Client":
     """
     Get Supabase client with user authentication
     
@@ -39,6 +54,8 @@ def get_authenticated_client(jwt_token: str) -> Client:
     Returns:
         Authenticated Supabase client
     """
+    from supabase import create_client
+
     url = os.environ.get("SUPABASE_URL", "")
     key = os.environ.get("SUPABASE_KEY", "")
     
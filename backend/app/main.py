@@ -22,6 +22,11 @@ from app.core.timeout import TimeoutMiddleware
 # Logging
 from app.core.logging import logger, log_api
 
+# Redaction
+from app.core.redaction import redactor
+from app.core.executor import redaction_executor
+from app.core.llm_client import close_providers
+
 # API Routers
 from app.api.endpoints import (
     intercept,
@@ -31,7 +36,8 @@ from app.api.endpoints import (
     cancel,
     policies,
     profiles,
-    health
+    health,
+    metrics
 )
 
 
@@ -44,6 +50,13 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info(f"Starting Bento API v{settings.API_VERSION} in {settings.ENVIRONMENT} mode")
     
+    # NER pipeline self-check (active components + cost per 1k tokens)
+    report = redactor.self_check()
+    logger.info(
+        f"NER pipeline ({report['backend']}): active={report['active']} disabled={report['disabled']} "
+        f"ms_per_1k_tokens={report['ms_per_1k_tokens']}"
+    )
+    
     # Initialize Redis for rate limiting
     try:
         redis_connection = redis.from_url(
@@ -63,6 +76,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Bento API")
+    redaction_executor.shutdown(wait=False)
+    redactor.close()
+    await close_providers()
     try:
         await redis_connection.close()
         logger.info("Redis connection closed")
@@ -137,6 +153,9 @@ async def root():
 # Health checks (no prefix)
 app.include_router(health.router, tags=["Health"])
 
+# Runtime metrics (no prefix)
+app.include_router(metrics.router, tags=["Metrics"])
+
 # API v1 endpoints
 app.include_router(
     intercept.router,
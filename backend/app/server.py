@@ -0,0 +1,153 @@
+"""
+Prefork Server
+Loads the app, the NER model and the read-only redaction tables once in a
+master process, freezes the GC and forks uvicorn workers on a shared socket,
+so those pages stay shared copy-on-write instead of being duplicated per worker.
+
+Usage:
+    python -m app.server    # binds settings.HOST:PORT with settings.WORKERS workers
+"""
+import gc
+import os
+import signal
+import socket
+import time
+from typing import Dict
+
+import uvicorn
+
+from app.config import settings
+from app.core.logging import logger
+from app.core.memory import process_memory
+
+RESPAWN_DELAY = 1.0  # seconds to wait before replacing a worker that died
+
+
+def preload():
+    """Import the app and build everything workers only read"""
+    from app.main import app
+    from app.core.redaction import redactor
+
+    # Loads the spaCy pipeline (inline backend) and times it once
+    report = redactor.self_check()
+    if redactor.ner_pool is not None:
+        # The process backend's self-check started the pool here; stop it
+        # before forking so workers don't inherit its processes and manager
+        # thread (each worker starts its own pool in after_fork)
+        redactor.ner_pool.shutdown(wait=True)
+    # Default plans: compiled scanner alternations and keyword automata
+    redactor.compile_plan(mode="redact")
+    redactor.compile_plan(mode="swap")
+    redactor.compile_plan(mode="mask")
+    logger.info(f"Preloaded app and NER pipeline ({report['backend']}): active={report['active']}")
+    return app
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Listening socket inherited by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(settings.SERVER_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """
+    Master process: forks `workers` uvicorn servers sharing one socket,
+    replaces workers that exit, forwards SIGTERM/SIGINT and periodically
+    logs per-worker memory.
+    """
+
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.children: Dict[int, int] = {}  # pid -> worker slot
+        self.stopping = False
+
+    def spawn(self, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            # Worker: collect only objects created after the fork
+            gc.enable()
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                from app.core.redaction import redactor
+                redactor.after_fork()
+                config = uvicorn.Config(self.app, lifespan="on", log_level=settings.LOG_LEVEL.lower())
+                uvicorn.Server(config).run(sockets=[self.sock])
+            except BaseException:
+                logger.exception(f"Worker {slot} crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = slot
+        logger.info(f"Started worker {slot} (pid {pid})")
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def memory_report(self) -> Dict[int, Dict[str, float]]:
+        """Log unique / shared / PSS memory per worker; returns {pid: breakdown}"""
+        report = {pid: process_memory(pid) for pid in self.children}
+        for pid, mem in report.items():
+            if mem:
+                logger.info(
+                    f"Worker {self.children[pid]} (pid {pid}) memory: unique={mem['unique']}MB "
+                    f"shared={mem['shared']}MB pss={mem['pss']}MB rss={mem['rss']}MB"
+                )
+        total_pss = sum(mem.get("pss", 0) for mem in report.values())
+        master = process_memory()
+        logger.info(f"Pod memory: workers_pss={total_pss:.1f}MB master_pss={master.get('pss', 0)}MB")
+        return report
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        # Move everything loaded so far out of the collector's reach, so
+        # collections in the workers never write to (and un-share) those pages
+        gc.freeze()
+        for slot in range(self.workers):
+            self.spawn(slot)
+
+        interval = settings.SERVER_MEMORY_REPORT_INTERVAL
+        next_report = time.monotonic() + min(interval, 30) if interval else None
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                time.sleep(0.5)
+                if next_report is not None and time.monotonic() >= next_report:
+                    self.memory_report()
+                    next_report = time.monotonic() + interval
+                continue
+            slot = self.children.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+            logger.warning(f"Worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            time.sleep(RESPAWN_DELAY)
+            self.spawn(slot)
+        logger.info("All workers stopped")
+
+
+def main():
+    # Avoid leaving freed "holes" in pages that workers will share
+    gc.disable()
+    app = preload()
+    sock = bind_socket(settings.HOST, settings.PORT)
+    logger.info(f"Listening on {settings.HOST}:{settings.PORT} with {settings.WORKERS} workers")
+    PreforkServer(app, sock, settings.WORKERS).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import asyncio
+
 from app.db.supabase import supabase
 from typing import List, Dict, Any
 
@@ -14,12 +16,13 @@ async def build_conversation_context(conversation_id: str, limit: int = 10) -> s
         # However, for simplicity, we can fetch all and check verdict logic, 
         # or just fetch all and assume the UI/User logic handles the rest.
         # Better: Fetch all, sort by time asc.
-        response = supabase.table("audit_logs")\
+        # The Supabase client is synchronous: run the query off the event loop
+        query = supabase.table("audit_logs")\
             .select("payload_raw, ai_reasoning, verdict, created_at")\
             .eq("metadata->>conversation_id", conversation_id)\
             .order("created_at", desc=True)\
-            .limit(limit)\
-            .execute()
+            .limit(limit)
+        response = await asyncio.to_thread(query.execute)
             
         logs = response.data or []
         # Reverse to get chronological order
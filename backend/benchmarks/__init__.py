@@ -0,0 +1,4 @@
+"""
+Bento Backend Benchmarks
+Standalone performance scripts, run from the backend directory with `python -m benchmarks.<name>`
+"""
@@ -0,0 +1,162 @@
+"""
+Synthetic PII Corpus
+Seeded generator of realistic payloads for the redaction benchmarks: chat
+turns, CRM records, log dumps and CSV-like lists with a controllable share
+of lines that carry PII.
+
+Usage:
+    from benchmarks.corpus import CorpusGenerator
+    gen = CorpusGenerator(seed=7, pii_density=0.3)
+    gen.chat_turns(200), gen.crm_records(500), gen.log_dump(1 << 20), gen.csv_rows(2000)
+"""
+import random
+from typing import Any, Dict, List
+
+FIRST_NAMES = ["Alice", "Rahul", "Maria", "Chen", "Fatima", "John", "Priya", "Lukas", "Amara", "Diego"]
+LAST_NAMES = ["Smith", "Sharma", "Garcia", "Wei", "Khan", "Miller", "Iyer", "Becker", "Okafor", "Lopez"]
+ORGS = ["Initrode", "Globex", "Umbrella Corp", "Hooli", "Vandelay Industries", "Stark Labs"]
+CITIES = ["Springfield", "Pune", "Valencia", "Shenzhen", "Lagos", "Hamburg", "Austin"]
+DOMAINS = ["example.com", "mail.test", "corp.example", "inbox.dev"]
+
+FILLER = (
+    "please review the latest numbers before the sync the dashboard shows a small dip "
+    "in weekly retention we should ship the fix behind a flag and monitor the error rate "
+    "can you also check whether the export job finished and share the summary"
+).split()
+LOG_PATHS = ["/api/v1/intercept", "/api/v1/scan", "/api/v1/history", "/health", "/api/v1/profiles"]
+LOG_LEVELS = ["INFO", "INFO", "INFO", "WARN", "ERROR", "DEBUG"]
+
+
+class CorpusGenerator:
+    """
+    Deterministic payload generator.
+
+    Args:
+        seed: RNG seed; the same seed and arguments always give the same corpus
+        pii_density: Probability (0-1) that a sentence/record/line carries PII
+    """
+
+    def __init__(self, seed: int = 7, pii_density: float = 0.3):
+        self.seed = seed
+        self.pii_density = pii_density
+        self.rng = random.Random(seed)
+
+    # ------------------------------------------------------------------
+    # PII fragments
+    # ------------------------------------------------------------------
+
+    def name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def email(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES).lower()}.{self.rng.randint(1, 999)}@{self.rng.choice(DOMAINS)}"
+
+    def phone(self) -> str:
+        return f"{self.rng.randint(200, 999)}-{self.rng.randint(200, 999)}-{self.rng.randint(1000, 9999)}"
+
+    def card(self) -> str:
+        return " ".join(f"{self.rng.randint(0, 9999):04d}" for _ in range(4))
+
+    def ssn(self) -> str:
+        return f"{self.rng.randint(100, 899)}-{self.rng.randint(10, 99)}-{self.rng.randint(1000, 9999)}"
+
+    def api_key(self) -> str:
+        alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+        return "sk-" + "".join(self.rng.choice(alphabet) for _ in range(32))
+
+    def pii_sentence(self) -> str:
+        templates = [
+            lambda: f"my name is {self.name()} and I live in {self.rng.choice(CITIES)}",
+            lambda: f"reach me at {self.email()} or {self.phone()}",
+            lambda: f"I work at {self.rng.choice(ORGS)} with {self.name()}",
+            lambda: f"card {self.card()} was charged twice",
+            lambda: f"my SSN is {self.ssn()}",
+            lambda: f"use key {self.api_key()} for staging",
+        ]
+        return self.rng.choice(templates)()
+
+    def filler(self, words: int) -> str:
+        return " ".join(self.rng.choice(FILLER) for _ in range(words))
+
+    def sentence(self) -> str:
+        if self.rng.random() < self.pii_density:
+            return f"{self.filler(self.rng.randint(3, 8))}, {self.pii_sentence()}."
+        return self.filler(self.rng.randint(8, 20)).capitalize() + "."
+
+    # ------------------------------------------------------------------
+    # Payload shapes
+    # ------------------------------------------------------------------
+
+    def chat_turns(self, turns: int) -> List[Dict[str, str]]:
+        """Chat transcript as a list of {role, content} messages"""
+        return [
+            {
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": " ".join(self.sentence() for _ in range(self.rng.randint(1, 4))),
+            }
+            for i in range(turns)
+        ]
+
+    def crm_records(self, count: int) -> List[Dict[str, Any]]:
+        """CRM-style contact records with ids, enums, timestamps and notes"""
+        records = []
+        for i in range(count):
+            has_pii = self.rng.random() < self.pii_density
+            records.append({
+                "id": f"{self.rng.getrandbits(128):032x}",
+                "status": self.rng.choice(["ACTIVE", "CHURNED", "TRIAL"]),
+                "created_at": f"2024-{self.rng.randint(1, 12):02d}-{self.rng.randint(1, 28):02d}T10:00:00Z",
+                "score": self.rng.randint(0, 100),
+                "contact": {
+                    "name": self.name() if has_pii else "unknown",
+                    "email": self.email() if has_pii else None,
+                    "phone": self.phone() if has_pii else None,
+                    "company": self.rng.choice(ORGS),
+                },
+                "notes": [self.sentence() for _ in range(self.rng.randint(0, 3))],
+                "tags": self.rng.sample(["vip", "beta", "enterprise", "smb", "renewal"], 2),
+            })
+        return records
+
+    def log_dump(self, size_bytes: int) -> str:
+        """Application log text of roughly `size_bytes`"""
+        lines = []
+        size = 0
+        while size < size_bytes:
+            line = (
+                f"2024-05-01T10:{self.rng.randint(0, 59):02d}:{self.rng.randint(0, 59):02d}Z "
+                f"{self.rng.choice(LOG_LEVELS)} {self.rng.choice(LOG_PATHS)} "
+                f"status={self.rng.choice([200, 200, 201, 400, 500])} latency_ms={self.rng.randint(1, 900)}"
+            )
+            if self.rng.random() < self.pii_density:
+                line += f" user={self.email()} msg=\"{self.pii_sentence()}\""
+            lines.append(line)
+            size += len(line) + 1
+        return "\n".join(lines)
+
+    def csv_rows(self, rows: int) -> List[List[str]]:
+        """CSV-like export as a header row plus string cells"""
+        table = [["name", "email", "phone", "city", "comment"]]
+        for _ in range(rows):
+            if self.rng.random() < self.pii_density:
+                table.append([self.name(), self.email(), self.phone(), self.rng.choice(CITIES), self.sentence()])
+            else:
+                table.append(["n/a", "n/a", "n/a", "n/a", self.filler(6)])
+        return table
+
+
+def stub_ner_pipeline():
+    """
+    Offline stand-in for the spaCy model: a blank English pipeline with an
+    entity ruler over the corpus vocabulary. It goes through the same
+    nlp.pipe path as the real model, so timings exercise the NER plumbing.
+    """
+    import spacy
+
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    patterns = [{"label": "PERSON", "pattern": f"{first} {last}"} for first in FIRST_NAMES for last in LAST_NAMES]
+    patterns += [{"label": "ORG", "pattern": org} for org in ORGS]
+    patterns += [{"label": "GPE", "pattern": city} for city in CITIES]
+    ruler.add_patterns(patterns)
+    return nlp
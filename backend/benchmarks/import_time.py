@@ -0,0 +1,47 @@
+"""
+Import Time Report
+Imports a module in a fresh interpreter with `-X importtime` and reports the
+total time plus the slowest imports (cumulative, including children).
+
+Usage:
+    python -m benchmarks.import_time --module app.main --top 15
+"""
+import argparse
+import subprocess
+import sys
+
+
+def measure(module: str) -> list[tuple[str, int, int]]:
+    """Return (module, self_us, cumulative_us) for every import, in load order"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total = next(cumulative for name, _, cumulative in rows if name == args.module)
+    print(f"import {args.module}: {total / 1000:.1f} ms ({len(rows)} modules)\n")
+    print(f"{'module':50} {'cumulative':>12} {'self':>10}")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{name:50} {cumulative_us / 1000:10.1f} ms {self_us / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Line Index Benchmark
+Compares the old prefix-count line lookup with the bisect-based LineIndex
+on a large log-like text with many hits.
+
+Usage:
+    python -m benchmarks.line_index --size-mb 1 --hits 10000
+"""
+import argparse
+import random
+import time
+
+from app.core.redaction import LineIndex
+
+
+def build_text(size_bytes: int, hit_count: int, seed: int = 7) -> tuple[str, list[int]]:
+    """Build a newline-heavy text and `hit_count` sorted offsets into it"""
+    rng = random.Random(seed)
+    words = ["GET", "/api/v1/intercept", "200", "user", "token", "latency", "ok", "retry"]
+    lines = []
+    size = 0
+    while size < size_bytes:
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(4, 12)))
+        lines.append(line)
+        size += len(line) + 1
+    text = "\n".join(lines)[:size_bytes]
+    offsets = sorted(rng.randrange(len(text)) for _ in range(hit_count))
+    return text, offsets
+
+
+def old_lookup(text: str, offsets: list[int]) -> list[int]:
+    lines = text.split("\n")
+    result = []
+    for offset in offsets:
+        line_num = text[:offset].count("\n") + 1
+        # Old extract_context sliced the pre-split line list per hit
+        lines[max(0, line_num - 3):line_num - 1]
+        result.append(line_num)
+    return result
+
+
+def new_lookup(text: str, offsets: list[int]) -> list[int]:
+    index = LineIndex(text)
+    result = []
+    for offset in offsets:
+        line_num = index.line_number(offset)
+        index.context(line_num - 1)
+        result.append(line_num)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--hits", type=int, default=10_000)
+    args = parser.parse_args()
+
+    text, offsets = build_text(int(args.size_mb * 1024 * 1024), args.hits)
+
+    start = time.perf_counter()
+    expected = old_lookup(text, offsets)
+    old_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = new_lookup(text, offsets)
+    new_s = time.perf_counter() - start
+
+    assert actual == expected, "LineIndex disagrees with prefix counting"
+    print(f"text={len(text):,} chars  hits={len(offsets):,}")
+    print(f"prefix count : {old_s * 1000:9.1f} ms")
+    print(f"LineIndex    : {new_s * 1000:9.1f} ms  ({old_s / new_s:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Redaction Benchmark
+Times redact_text and redact_json on a seeded synthetic corpus for the
+regex-only, keyword-heavy and NER paths, writes a JSON report and optionally
+compares it against a saved baseline.
+
+Runs offline: without the spaCy model the NER path uses a stub entity-ruler
+pipeline (reported as "ner": "stub"). The result memo is disabled unless
+--memo is given, so repeated runs measure the scan itself.
+
+Usage:
+    python -m benchmarks.redaction --output report.json
+    python -m benchmarks.redaction --baseline report.json --threshold 0.15
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+from app.config import settings
+from app.core import redaction
+from benchmarks.corpus import CorpusGenerator, stub_ner_pipeline
+
+KEYWORD_COUNT = 2000
+
+# Policy config that turns off every NER label
+NO_NER = {"redact_person": False, "redact_org": False, "redact_gpe": False}
+
+
+def build_corpus(size_kb: int, pii_density: float, seed: int) -> Dict[str, Dict[str, Any]]:
+    """Text and JSON targets of roughly `size_kb` each"""
+    gen = CorpusGenerator(seed=seed, pii_density=pii_density)
+    scale = max(1, size_kb)
+    chat = gen.chat_turns(3 * scale)
+    csv = gen.csv_rows(5 * scale)
+    return {
+        "text": {
+            "chat": "\n".join(turn["content"] for turn in chat),
+            "logs": gen.log_dump(size_kb * 1024),
+            "csv": "\n".join(",".join(row) for row in csv),
+        },
+        "json": {
+            "chat": {"model": "gemini", "messages": chat},
+            "crm": {"records": gen.crm_records(2 * scale)},
+            "csv": {"rows": csv},
+        },
+    }
+
+
+def keyword_config(seed: int) -> Dict[str, Any]:
+    """Keyword-heavy policy: a long custom keyword list plus all regex detectors"""
+    gen = CorpusGenerator(seed=seed)
+    keywords = [f"project {gen.filler(1)}-{i}" for i in range(KEYWORD_COUNT - 3)]
+    keywords += ["Initrode", "Globex", "dashboard"]
+    return {**NO_NER, "custom_keywords": keywords}
+
+
+def time_call(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    func()  # warm-up: plan compilation, lazy indexes
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3)}
+
+
+def run(args) -> Dict[str, Any]:
+    settings.REDACTION_MEMO_ENABLED = args.memo
+    ner = "model"
+    if redaction.get_ner_pipeline() is None:
+        redaction.nlp = stub_ner_pipeline()
+        ner = "stub"
+    service = redaction.RedactionService()
+
+    corpus = build_corpus(args.size_kb, args.density, args.seed)
+    configs = {"regex": NO_NER, "keywords": keyword_config(args.seed), "ner": {}}
+    results = {}
+    for path, config in configs.items():
+        for name, text in corpus["text"].items():
+            plan = service.compile_plan(config, mode="redact")
+            timing = time_call(lambda text=text, plan=plan: service.redact_text(text, plan=plan), args.repeat)
+            hits = len(service.redact_text(text, plan=plan)[1])
+            results[f"redact_text/{path}/{name}"] = {**timing, "hits": hits, "chars": len(text)}
+        for name, payload in corpus["json"].items():
+            plan = service.compile_plan(config, mode="mask")
+            timing = time_call(lambda payload=payload, plan=plan: service.redact_json(payload, plan=plan), args.repeat)
+            hits = len(service.redact_json(payload, plan=plan)[1])
+            results[f"redact_json/{path}/{name}"] = {**timing, "hits": hits, "bytes": len(json.dumps(payload))}
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "size_kb": args.size_kb,
+            "density": args.density,
+            "repeat": args.repeat,
+            "memo": args.memo,
+            "ner": ner,
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> list[str]:
+    """Print a comparison table; return the cases slower than baseline by more than `threshold`"""
+    regressions = []
+    print(f"\n{'case':40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for case, current in report["results"].items():
+        base = baseline.get("results", {}).get(case)
+        if base is None:
+            print(f"{case:40} {'-':>10} {current['median_ms']:10.1f} {'new':>8}")
+            continue
+        change = current["median_ms"] / base["median_ms"] - 1 if base["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(case)
+            flag = "  <-- regression"
+        if current["hits"] != base["hits"]:
+            flag += f"  (hits {base['hits']} -> {current['hits']})"
+        print(f"{case:40} {base['median_ms']:10.1f} {current['median_ms']:10.1f} {change:+8.1%}{flag}")
+    if baseline.get("meta", {}).get("ner") != report["meta"]["ner"]:
+        print(f"\nnote: baseline NER={baseline.get('meta', {}).get('ner')}, current NER={report['meta']['ner']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-kb", type=int, default=256, help="approximate size of each corpus target")
+    parser.add_argument("--density", type=float, default=0.3, help="share of sentences/records carrying PII")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--memo", action="store_true", help="keep the result memo enabled")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against a saved report")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown vs baseline (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    report = run(args)
+    for case, result in report["results"].items():
+        print(f"{case:40} {result['median_ms']:10.1f} ms  hits={result['hits']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nreport written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
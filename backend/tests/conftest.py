@@ -2,6 +2,7 @@
 Pytest Configuration
 """
 import pytest
+import pytest_asyncio
 import asyncio
 
 
@@ -25,3 +26,31 @@ def mock_redis_client():
     """Mock Redis client for testing"""
     from unittest.mock import AsyncMock
     return AsyncMock()
+
+
+@pytest_asyncio.fixture
+async def make_auditor():
+    """Build GroqAuditors whose provider is served by a mock httpx handler.
+
+    Pass either a handler (``httpx.Request -> httpx.Response``, sync or async)
+    or a ``verdict`` dict that every chat completion answers with.
+    """
+    import httpx
+    import json
+    from app.core.auditor import GroqAuditor
+    from app.core.llm_client import GroqProvider
+
+    auditors = []
+
+    def factory(handler=None, *, verdict=None):
+        if handler is None:
+            content = json.dumps(verdict)
+            handler = lambda request: httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+        auditor = GroqAuditor()
+        auditor.provider = GroqProvider("test-key", transport=httpx.MockTransport(handler))
+        auditors.append(auditor)
+        return auditor
+
+    yield factory
+    for auditor in auditors:
+        await auditor.provider.aclose()
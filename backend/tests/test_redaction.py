@@ -0,0 +1,641 @@
+"""
+Redaction Engine Tests
+Deterministic tests for the regex / keyword stages of RedactionService
+"""
+import asyncio
+import random
+import re
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import spacy
+
+from app.core import redaction
+from app.core.redaction import (
+    Hit,
+    LineIndex,
+    PayloadLimitError,
+    RedactionService,
+    compile_scanner,
+    load_ner_pipeline,
+    ner_self_check,
+    resolve_spans,
+    serialize_hits,
+)
+from app.core.keyword_matcher import compile_keyword_automaton
+
+
+redactor = RedactionService()
+
+
+@pytest.fixture
+def ruler_nlp(monkeypatch):
+    """Deterministic stand-in for en_core_web_sm: a blank pipeline with an entity ruler"""
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([
+        {"label": "PERSON", "pattern": "Alice Smith"},
+        {"label": "ORG", "pattern": "Initrode"},
+        {"label": "GPE", "pattern": "Springfield"},
+    ])
+    monkeypatch.setattr(redaction, "nlp", nlp)
+    return nlp
+
+
+# ============================================================================
+# Single-pass Scanner Tests
+# ============================================================================
+
+def test_scanner_redacts_all_detectors_in_one_pass():
+    """Every enabled detector is replaced and reported with its line number"""
+    text = "mail bob@example.com\ncall 555-123-4567 or use sk-abcdefghijklmnopqrstuvwxyz"
+    redacted, hits = redactor.redact_text(text)
+
+    assert redacted == "mail [EMAIL_REDACTED]\ncall [PHONE_REDACTED] or use [API_KEY_REDACTED]"
+    assert [(h.type, h.line_number) for h in hits] == [
+        ("email", 1),
+        ("phone", 2),
+        ("api_key", 2),
+    ]
+
+
+def test_scanner_respects_disabled_detectors_and_keywords():
+    """Disabled detectors are left alone; custom keywords match case-insensitively"""
+    text = "bob@example.com works on manhattan"
+    config = {"redact_email": False, "custom_keywords": ["Manhattan"]}
+    redacted, hits = redactor.redact_text(text, config=config)
+
+    assert redacted == "bob@example.com works on [REDACTED]"
+    assert [h.type for h in hits] == ["CUSTOM_KEYWORD"]
+
+
+def test_keywords_take_priority_over_overlapping_detectors():
+    """A keyword inside a detector match wins the replacement, stretched over the whole match"""
+    text = "bob@example.combob@example.com"
+    redacted, _ = redactor.redact_text(text, config={"custom_keywords": ["b@e"]})
+
+    assert redacted == "[REDACTED]xample.com"
+    assert "[EMAIL_REDACTED]" not in redacted
+
+
+def test_keyword_inside_detector_match_leaves_nothing_in_clear():
+    """The part of an email / phone number outside an overlapping keyword is redacted too"""
+    redacted, _ = redactor.redact_text("Contact john.doe@gmail.com today", config={"custom_keywords": ["john"]})
+    assert redacted == "Contact [REDACTED] today"
+
+    redacted, _ = redactor.redact_text("call +1-555-123-4567 now", config={"custom_keywords": ["555"]})
+    assert redacted == "call +[REDACTED] now"
+
+
+def test_compile_scanner_is_cached():
+    """Identical detector sets reuse the same compiled alternation"""
+    detectors = tuple((key, p.pattern) for key, p in redactor.patterns.items())
+    assert compile_scanner(detectors) is compile_scanner(detectors)
+    assert compile_scanner(()) is None
+
+
+# ============================================================================
+# Line Index Tests
+# ============================================================================
+
+def test_line_index_matches_prefix_count():
+    """Bisect lookups agree with counting newlines in the prefix"""
+    text = "a\nbb\n\nccc\nd"
+    index = LineIndex(text)
+    for offset in range(len(text) + 1):
+        assert index.line_number(offset) == text[:offset].count("\n") + 1
+
+
+def test_line_index_context_matches_split_lines():
+    """Context lines are identical to slicing a pre-split line list"""
+    text = "l0\nl1\nl2\nl3\nl4\nl5"
+    lines = text.split("\n")
+    index = LineIndex(text)
+    for i in range(len(lines)):
+        assert index.context(i) == {
+            "before": lines[max(0, i - 2):i],
+            "match": lines[i],
+            "after": lines[i + 1:min(len(lines), i + 3)],
+        }
+
+
+# ============================================================================
+# Hit Record Tests
+# ============================================================================
+
+def test_hit_is_slotted_and_lazy():
+    """Hits store offsets only and derive value/line/context on demand"""
+    text = "one\ntwo bob@example.com\nthree"
+    _, hits = redactor.redact_text(text)
+    hit = hits[0]
+
+    assert isinstance(hit, Hit)
+    assert not hasattr(hit, "__dict__")
+    assert (hit.value, hit.line_number) == ("bob@example.com", 2)
+    assert hit.context == {"before": ["one"], "match": "two bob@example.com", "after": ["three"]}
+
+
+def test_serialize_hits_caps_context():
+    """Only the first N hits carry context lines once serialized"""
+    text = "\n".join(f"user{i}@example.com" for i in range(5))
+    _, hits = redactor.redact_text(text)
+    serialized = serialize_hits(hits, max_context_hits=2)
+
+    assert len(serialized) == 5
+    assert ["context" in h for h in serialized] == [True, True, False, False, False]
+    assert serialized[4] == {"type": "email", "value": "user4@example.com", "line_number": 5}
+
+
+# ============================================================================
+# Keyword Automaton Tests
+# ============================================================================
+
+def test_keyword_automaton_matches_re_finditer():
+    """Each keyword yields exactly the matches of a case-insensitive re.finditer"""
+    keywords = ("Acme", "acme corp", "CORP", "aa")
+    text = "ACME Corp and acme corporation, aaaa acmecorp"
+    automaton = compile_keyword_automaton(keywords)
+
+    expected = [
+        (m.start(), m.end(), idx)
+        for idx, keyword in enumerate(keywords)
+        for m in re.finditer(re.escape(keyword), text, re.IGNORECASE)
+    ]
+    assert automaton.finditer(text) == expected
+    assert compile_keyword_automaton(keywords) is automaton
+
+
+def test_custom_keywords_apply_in_order():
+    """Earlier keywords win overlaps, as with sequential substitution"""
+    config = {"custom_keywords": ["project", "project manhattan"]}
+    redacted, hits = redactor.redact_text("project manhattan, Project x", config=config)
+
+    assert redacted == "[REDACTED] manhattan, [REDACTED] x"
+    assert [h.value for h in hits] == ["project", "Project"]
+
+
+# ============================================================================
+# Redaction Plan Tests
+# ============================================================================
+
+def test_equivalent_configs_share_one_plan():
+    """Plans are cached by a stable hash of the settings that affect redaction"""
+    service = RedactionService()
+    plan = service.compile_plan({"redact_email": False, "auditor_prompt": "a"}, mode="swap")
+
+    assert service.compile_plan({"auditor_prompt": "b", "redact_email": False}, mode="swap") is plan
+    assert service.compile_plan({"redact_email": False}, mode="redact") is not plan
+    assert "email" not in plan.scanner.groupindex
+
+
+def test_plan_from_user_profile_row():
+    """user_profiles toggles (redact_payment, redact_names, ...) map onto detectors"""
+    profile = {"redact_email": True, "redact_payment": False, "redact_names": False, "custom_keywords": None}
+    plan = redactor.compile_plan(profile)
+
+    assert "credit_card" not in plan.scanner.groupindex
+    assert "email" in plan.scanner.groupindex
+    assert plan.ner_labels == frozenset({"ORG", "GPE"})
+    assert plan.automaton is None
+
+
+# ============================================================================
+# Batched NER Tests
+# ============================================================================
+
+def test_redact_json_batches_ner_across_leaves(ruler_nlp, monkeypatch):
+    """All string leaves go through one nlp.pipe call and match per-leaf results"""
+    payload = {
+        "owner": "Alice Smith",
+        "notes": ["works at Initrode", {"home": "my house is in Springfield"}],
+        "seen": "Springfield office tour",
+        "count": 3,
+    }
+    expected = {
+        "owner": redactor.redact_text("Alice Smith")[0],
+        "notes": [redactor.redact_text("works at Initrode")[0], {"home": redactor.redact_text("my house is in Springfield")[0]}],
+        "seen": "Springfield office tour",
+        "count": 3,
+    }
+
+    calls = []
+    original_pipe = ruler_nlp.pipe
+    monkeypatch.setattr(ruler_nlp, "pipe", lambda texts, **kw: calls.append(1) or original_pipe(texts, **kw))
+    redacted, hits = redactor.redact_json(payload, mode="redact")
+
+    assert redacted == expected
+    assert redacted["owner"] == "[PERSON_REDACTED]"
+    assert [h.type for h in hits] == ["PERSON", "ORG", "GPE"]
+    assert len(calls) == 1
+
+
+# ============================================================================
+# Trimmed Pipeline Tests
+# ============================================================================
+
+def test_load_ner_pipeline_enables_only_listed_components(tmp_path):
+    """Components not listed in settings are never loaded and are reported as disabled"""
+    full = spacy.blank("en")
+    full.add_pipe("sentencizer")
+    full.add_pipe("entity_ruler").add_patterns([{"label": "ORG", "pattern": "Initrode"}])
+    full.to_disk(tmp_path / "model")
+
+    pipeline = load_ner_pipeline(str(tmp_path / "model"), components=["entity_ruler"])
+    report = ner_self_check(pipeline)
+
+    assert pipeline.pipe_names == ["entity_ruler"]
+    assert pipeline.component_names == ["entity_ruler"]
+    assert report["active"] == ["entity_ruler"]
+    assert report["disabled"] == ["sentencizer"]
+    assert set(report["ms_per_1k_tokens"]) == {"tokenizer", "entity_ruler"}
+
+
+def test_load_ner_pipeline_missing_model():
+    """A missing model degrades to regex-only redaction"""
+    assert load_ner_pipeline("bento_missing_model") is None
+
+
+# ============================================================================
+# Process-pool NER Tests
+# ============================================================================
+
+def test_ner_process_pool_returns_offset_tuples(tmp_path):
+    """Worker processes load the model once and return (start, end, label) spans"""
+    from app.core.ner import NERProcessPool
+
+    model = spacy.blank("en")
+    model.add_pipe("entity_ruler").add_patterns([{"label": "PERSON", "pattern": "Alice Smith"}])
+    model.to_disk(tmp_path / "model")
+
+    pool = NERProcessPool(processes=2, model=str(tmp_path / "model"), components=["entity_ruler"], batch_size=2)
+    try:
+        texts = ["hi Alice Smith", "nobody here", "Alice Smith and Alice Smith"]
+        assert pool.entities(texts) == [
+            [(3, 14, "PERSON")],
+            [],
+            [(0, 11, "PERSON"), (16, 27, "PERSON")],
+        ]
+        assert pool.self_check()["active"] == ["entity_ruler"]
+    finally:
+        pool.shutdown()
+
+
+# ============================================================================
+# NER Prefilter Tests
+# ============================================================================
+
+def test_ner_prefilter_skips_entity_free_leaves(ruler_nlp, monkeypatch):
+    """UUIDs, numbers, enums and lowercase text never reach the model"""
+    service = RedactionService()
+    sent = []
+    original_pipe = ruler_nlp.pipe
+    monkeypatch.setattr(ruler_nlp, "pipe", lambda texts, **kw: original_pipe(sent.extend(texts) or texts, **kw))
+
+    payload = {
+        "id": "550e8400-e29b-41d4-a716-446655440000",
+        "created_at": "2024-05-01T10:00:00Z",
+        "amount": "1,250.00",
+        "status": "pending",
+        "blob": "QWxpY2UgU21pdGggbGl2ZXMgaGVyZQ==",
+        "note": "all lowercase here",
+        "owner": "Alice Smith",
+    }
+    redacted, hits = service.redact_json(payload)
+
+    assert sent == ["Alice Smith"]
+    assert redacted["owner"] == "[PERSON_REDACTED]"
+    gate = service.stats()["ner_gate"]
+    assert (gate["checked"], gate["sent"]) == (7, 1)
+    assert gate["skipped_shape"] == 1
+    assert gate["skipped_no_capital"] == 5
+
+
+def test_ner_prefilter_sends_all_caps_names():
+    """Upper-case names and acronyms are not mistaken for text without capitals"""
+    for text in ("JOHN SMITH", "ACME CORP", "IBM", "ask IBM today", "Élodie"):
+        assert RedactionService._ner_skip_reason(text) is None
+    for text in ("lowercase only", "A b c d", "x1 Y2 z3"):
+        assert RedactionService._ner_skip_reason(text) == "skipped_no_capital"
+
+
+# ============================================================================
+# Memo Cache Tests
+# ============================================================================
+
+def test_memo_replays_identical_results(ruler_nlp):
+    """A memo hit returns the same text and hits as the original scan"""
+    service = RedactionService()
+    text = "mail bob@example.com\nmy friend Alice Smith"
+    first, first_hits = service.redact_text(text)
+    second, second_hits = service.redact_text(text)
+
+    assert second == first == "mail [EMAIL_REDACTED]\nmy friend [PERSON_REDACTED]"
+    assert serialize_hits(second_hits) == serialize_hits(first_hits)
+    memo = service.stats()["memo"]
+    assert (memo["hits"], memo["misses"]) == (1, 1)
+
+    # Different plans never share entries
+    service.redact_text(text, mode="swap")
+    assert service.stats()["memo"]["misses"] == 2
+
+
+def test_redact_json_scans_duplicate_leaves_once(ruler_nlp, monkeypatch):
+    """Identical leaves in one payload are redacted once and reported per occurrence"""
+    service = RedactionService()
+    sent = []
+    original_pipe = ruler_nlp.pipe
+    monkeypatch.setattr(ruler_nlp, "pipe", lambda texts, **kw: original_pipe(sent.extend(texts) or texts, **kw))
+
+    payload = [{"author": "Alice Smith", "mail": "bob@example.com"} for _ in range(3)]
+    redacted, hits = service.redact_json(payload)
+
+    assert redacted == [{"author": "[PERSON_REDACTED]", "mail": "[EMAIL_REDACTED]"}] * 3
+    assert [h.type for h in hits] == ["PERSON", "email"] * 3
+    assert sent == ["Alice Smith"]
+
+
+def test_lru_cache_evicts_by_size():
+    """Entries are dropped oldest-first once the byte budget is exceeded"""
+    from app.core.cache import LRUCache
+
+    cache = LRUCache(maxsize=10, max_bytes=100)
+    cache.set("a", 1, size=40)
+    cache.set("b", 2, size=40)
+    cache.get("a")
+    cache.set("c", 3, size=40)
+    cache.set("huge", 4, size=101)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c"), cache.get("huge")) == (1, None, 3, None)
+    assert cache.stats()["bytes"] == 80
+    assert cache.stats()["evictions"] == 1
+
+
+# ============================================================================
+# Span Resolution Tests
+# ============================================================================
+
+def test_all_hit_offsets_point_into_original_text(ruler_nlp):
+    """Regex and NER hits share one coordinate system: the input string"""
+    service = RedactionService()
+    text = "mail bob@example.com\nmy friend Alice Smith lives in Springfield"
+    redacted, hits = service.redact_text(text)
+
+    assert redacted == "mail [EMAIL_REDACTED]\nmy friend [PERSON_REDACTED] lives in [GPE_REDACTED]"
+    assert [(h.type, h.start, h.end) for h in hits] == [("email", 5, 20), ("PERSON", 31, 42), ("GPE", 52, 63)]
+    assert all(text[h.start:h.end] == h.value for h in hits)
+
+
+def test_overlapping_spans_resolve_by_priority(ruler_nlp):
+    """Keywords beat regex detectors, which beat NER entities; the loser's text is redacted too"""
+    service = RedactionService()
+    config = {"custom_keywords": ["Smith"]}
+    redacted, hits = service.redact_text("my friend Alice Smith", config=config)
+
+    assert redacted == "my friend [REDACTED]"
+    assert [(h.type, h.value) for h in hits] == [("CUSTOM_KEYWORD", "Smith"), ("PERSON", "Alice Smith")]
+    assert resolve_spans([(5, 9, "a")], [(0, 3, "b"), (4, 6, "c"), (9, 12, "d")]) == [
+        (0, 3, "b"), (4, 9, "a"), (9, 12, "d"),
+    ]
+    assert resolve_spans([(5, 9, "a")], [(0, 3, "b"), (4, 6, "c"), (8, 12, "d")]) == [(0, 3, "b"), (4, 12, "a")]
+    assert resolve_spans([], [(0, 4, "b"), (2, 6, "c")]) == [(0, 6, "b")]
+
+
+def test_detector_hits_under_keywords_are_still_reported():
+    """A keyword wins the replacement, but the overlapping detector match is still a hit"""
+    redacted, hits = redactor.redact_text("mail bob@example.com", config={"custom_keywords": ["example"]})
+
+    assert redacted == "mail [REDACTED]"
+    assert [(h.type, h.value) for h in hits] == [("CUSTOM_KEYWORD", "example"), ("email", "bob@example.com")]
+
+
+# ============================================================================
+# Context Vocabulary Tests
+# ============================================================================
+
+def test_trigger_index_matches_prefix_substring_check():
+    """The one-scan trigger lookup agrees with checking each 50-char prefix"""
+    text = "I stay at a big house. " * 3 + "Report from the annual office party " + "x" * 60 + " Alice"
+    ends, latest_starts = redactor._trigger_index(text)
+    for start in range(len(text) + 1):
+        prefix = text[max(0, start - 50):start].lower()
+        expected = any(trigger in prefix for trigger in redactor.personal_triggers)
+        i = bisect_right(ends, start)
+        assert (i > 0 and latest_starts[i - 1] >= start - 50) == expected, start
+
+
+def test_vocabularies_load_from_files(tmp_path, monkeypatch, ruler_nlp):
+    """Whitelist and triggers come from external files and can be large"""
+    whitelist = tmp_path / "whitelist.txt"
+    whitelist.write_text("# public names\n" + "\n".join(f"entity {i}" for i in range(20000)) + "\nINITRODE\n")
+    triggers = tmp_path / "triggers.txt"
+    triggers.write_text("employer\n")
+    monkeypatch.setattr(redaction.settings, "REDACTION_WHITELIST_PATH", str(whitelist))
+    monkeypatch.setattr(redaction.settings, "REDACTION_TRIGGERS_PATH", str(triggers))
+    service = RedactionService()
+
+    assert len(service.public_whitelist) == 20001
+    assert service.redact_text("works at Initrode")[0] == "works at Initrode"
+    assert service.redact_text("my employer is Initrode")[0] == "my employer is [ORG_REDACTED]"
+
+
+# ============================================================================
+# Structure-sharing Traversal Tests
+# ============================================================================
+
+def test_redact_json_copies_only_modified_paths():
+    """Clean subtrees are returned as-is; the input is never mutated"""
+    clean = {"tags": ["a", "b"], "meta": {"n": 1}}
+    payload = {"clean": clean, "user": {"contact": ["x", "bob@example.com"]}, "n": None}
+    redacted, hits = redactor.redact_json(payload)
+
+    assert redacted["user"]["contact"] == ["x", "[EMAIL_REDACTED]"]
+    assert payload["user"]["contact"][1] == "bob@example.com"
+    assert redacted is not payload and redacted["user"] is not payload["user"]
+    assert redacted["clean"] is clean
+    assert [h.type for h in hits] == ["email"]
+
+    untouched = {"a": [{"b": "nothing here"}]}
+    assert redactor.redact_json(untouched)[0] is untouched
+
+
+def test_redact_json_handles_deep_nesting_and_limits(monkeypatch):
+    """Deep payloads don't hit the recursion limit; depth/node caps raise"""
+    deep = leaf = []
+    for _ in range(5000):
+        child = []
+        leaf.append(child)
+        leaf = child
+    leaf.append("bob@example.com")
+
+    monkeypatch.setattr(redaction.settings, "REDACTION_MAX_DEPTH", 10000)
+    redacted, hits = redactor.redact_json(deep)
+    assert len(hits) == 1
+
+    monkeypatch.setattr(redaction.settings, "REDACTION_MAX_DEPTH", 100)
+    with pytest.raises(PayloadLimitError):
+        redactor.redact_json(deep)
+
+    monkeypatch.setattr(redaction.settings, "REDACTION_MAX_NODES", 10)
+    with pytest.raises(PayloadLimitError):
+        redactor.redact_json({"items": list(range(20))})
+
+
+# ============================================================================
+# Streaming Redaction Tests
+# ============================================================================
+
+def test_redact_stream_matches_redact_text(ruler_nlp, monkeypatch):
+    """Windowed output and hits equal a single full-text pass, whatever the chunking"""
+    monkeypatch.setattr(redaction.settings, "REDACTION_STREAM_WINDOW", 120)
+    monkeypatch.setattr(redaction.settings, "REDACTION_STREAM_OVERLAP", 40)
+    service = RedactionService()
+    config = {"custom_keywords": ["manhattan"]}
+    lines = [
+        f"row {i}: mail user{i}@example.com, my friend Alice Smith lives in Springfield, project Manhattan"
+        for i in range(30)
+    ]
+    text = "\n".join(lines)
+    expected, expected_hits = service.redact_text(text, config=config)
+
+    for size in (1, 7, 500, len(text)):
+        chunks = (text[i:i + size] for i in range(0, len(text), size))
+        windows = list(service.redact_stream(chunks, config=config))
+        hits = [hit for _, window_hits in windows for hit in window_hits]
+
+        assert len(windows) > 1
+        assert "".join(redacted for redacted, _ in windows) == expected
+        key = lambda h: (h.start, h.type)
+        assert [(h.type, h.start, h.end, h.value, h.line_number) for h in sorted(hits, key=key)] == [
+            (h.type, h.start, h.end, h.value, h.line_number) for h in sorted(expected_hits, key=key)
+        ]
+
+
+def test_redact_stream_never_leaks_across_windows(ruler_nlp, monkeypatch):
+    """Random windows, overlaps and chunk sizes over back-to-back matches give the redact_text output"""
+    rng = random.Random(7)
+    alnum = "abcdefghijklmnopqrstuvwxyz0123456789"
+    tokens = [
+        lambda: "sk-" + "".join(rng.choice(alnum) for _ in range(rng.randint(20, 24))),
+        lambda: f"user{rng.randint(0, 999)}@example.com",
+        lambda: f"{rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(1000, 9999)}",
+        lambda: "my friend Alice Smith",
+        lambda: "Initrode",
+        lambda: "project manhattan",
+    ]
+    service = RedactionService()
+    config = {"custom_keywords": ["example", "project manhattan", "smith"]}
+    for _ in range(300):
+        text = "".join(rng.choice(tokens)() + rng.choice(("", "", " ", "\n", ", ")) for _ in range(rng.randint(5, 40)))
+        expected, expected_hits = service.redact_text(text, config=config)
+
+        # Only matches longer than the overlap may be split (see redact_stream)
+        longest = max((h.end - h.start for h in expected_hits), default=0)
+        window = rng.randint(40, 200)
+        monkeypatch.setattr(redaction.settings, "REDACTION_STREAM_WINDOW", window)
+        monkeypatch.setattr(redaction.settings, "REDACTION_STREAM_OVERLAP", rng.randint(max(35, longest + 1), max(window, longest + 1)))
+        size = rng.randint(1, 80)
+        windows = list(service.redact_stream((text[i:i + size] for i in range(0, len(text), size)), config=config))
+        hits = [hit for _, window_hits in windows for hit in window_hits]
+
+        assert "".join(redacted for redacted, _ in windows) == expected
+        assert sorted((h.type, h.start, h.end) for h in hits) == sorted((h.type, h.start, h.end) for h in expected_hits)
+
+
+def test_redact_stream_swap_matches_redact_text(ruler_nlp, monkeypatch):
+    """Swap values are seeded by the whole text's length, not by each window's"""
+    monkeypatch.setattr(redaction.settings, "REDACTION_STREAM_WINDOW", 60)
+    monkeypatch.setattr(redaction.settings, "REDACTION_STREAM_OVERLAP", 30)
+    service = RedactionService()
+    text = " ".join(f"mail user{i}@example.com or call 555-123-400{i % 10}." for i in range(20)) + " done"
+    expected, _ = service.redact_text(text, mode="swap")
+
+    windows = list(service.redact_stream([text], mode="swap", total_length=len(text)))
+
+    assert len(windows) > 1
+    assert "".join(redacted for redacted, _ in windows) == expected
+
+
+# ============================================================================
+# Redaction Sidecar Tests
+# ============================================================================
+
+@pytest.fixture
+def sidecar(tmp_path, ruler_nlp, monkeypatch):
+    """A sidecar server on its own event loop thread, with clients pointed at it"""
+    from app.core.sidecar import RedactionSidecar
+
+    path = str(tmp_path / "redaction.sock")
+    monkeypatch.setattr(redaction.settings, "REDACTION_SIDECAR_SOCKET", path)
+    server = RedactionSidecar(path, service=RedactionService(ner_backend="inline"), batch_ms=20)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result(5)
+    yield server
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def test_sidecar_protocol_round_trip():
+    """Entries survive encoding, including unchanged strings and non-ASCII text"""
+    from app.core.sidecar import decode_request, decode_result, encode_request, encode_result
+
+    texts = ["plain", "mail bob@example.com", "café 😀 Alice Smith"]
+    entries = [
+        ("plain", ()),
+        ("mail [EMAIL_REDACTED]", (("email", 5, 20),)),
+        ("café 😀 [PERSON_REDACTED]", (("PERSON", 7, 18),)),
+    ]
+    assert decode_request(encode_request("{}", texts)) == ("{}", texts)
+    assert decode_result(encode_result(entries, texts), texts) == entries
+
+
+def test_sidecar_backend_matches_in_process(sidecar):
+    """Workers get the same output through the sidecar, batched across callers"""
+    payload = {"owner": "Alice Smith", "mail": "bob@example.com", "notes": ["my house is in Springfield", "ok"]}
+    expected, expected_hits = RedactionService(ner_backend="inline").redact_json(payload)
+    client = RedactionService(ner_backend="sidecar")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: client.redact_json(payload), range(8)))
+
+    for redacted, hits in results:
+        assert redacted == expected
+        assert [(h.type, h.start, h.end, h.value) for h in hits] == [
+            (h.type, h.start, h.end, h.value) for h in expected_hits
+        ]
+    stats = sidecar.stats()
+    assert stats["requests"] == 8
+    assert stats["batches"] < stats["requests"]
+    assert client.stats()["sidecar"]["failures"] == 0
+    assert client.self_check()["backend"] == "sidecar"
+
+
+def test_sidecar_backend_never_loads_the_model_in_workers(sidecar, monkeypatch):
+    """Memo keys, JSON leaves and stream windows all leave NER to the daemon"""
+    monkeypatch.setattr(redaction.settings, "REDACTION_STREAM_WINDOW", 40)
+    monkeypatch.setattr(redaction.settings, "REDACTION_STREAM_OVERLAP", 35)
+    loads = []
+    get_ner_pipeline = redaction.get_ner_pipeline
+    monkeypatch.setattr(redaction, "get_ner_pipeline", lambda: loads.append(threading.current_thread().name) or get_ner_pipeline())
+    client = RedactionService(ner_backend="sidecar")
+    text = "mail bob@example.com, my friend Alice Smith lives in Springfield. " * 4
+    expected, _ = RedactionService(ner_backend="inline").redact_text(text)
+    loads.clear()
+
+    assert client.redact_json({"owner": "Alice Smith"})[0] == {"owner": "[PERSON_REDACTED]"}
+    assert "".join(redacted for redacted, _ in client.redact_stream([text])) == expected
+    assert loads and all(name.startswith("sidecar") for name in loads)
+
+
+def test_sidecar_backend_falls_back_in_process(tmp_path, ruler_nlp, monkeypatch):
+    """An unreachable sidecar degrades to in-process redaction and backs off"""
+    monkeypatch.setattr(redaction.settings, "REDACTION_SIDECAR_SOCKET", str(tmp_path / "missing.sock"))
+    client = RedactionService(ner_backend="sidecar")
+
+    assert client.redact_text("my friend Alice Smith")[0] == "my friend [PERSON_REDACTED]"
+    assert client.redact_text("mail bob@example.com")[0] == "mail [EMAIL_REDACTED]"
+    assert client.stats()["sidecar"] == {"socket": str(tmp_path / "missing.sock"), "requests": 1, "failures": 1}